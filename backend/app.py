@@ -1,18 +1,299 @@
 # backend/app.py
-from flask import Flask, jsonify, request
+from flask import Flask, Request, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import queue
+import threading
+import time
 import traceback
 import uuid
 
+from services import metrics, tracing
+from services.audio import source_size, spooled_file
+from services.metrics import record_openai_usage, upstream
+from services.save_queue import get_save_queue, write_behind_enabled
 from services.transcription import transcribe_audio
 from fallacmodel import analyze_audio_to_json, generate_json_from_text
-from factchecker import FactCheckerAgent
+from factchecker import GOOGLE_SEARCH_URL, agent_initialized, get_agent, keys_configured
+
+class UploadRequest(Request):
+    """Spools uploaded files to disk past UPLOAD_SPOOL_BYTES instead of keeping them in memory."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_file()
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
+# Uploads larger than this are rejected with 413 before they are read
+app.config["MAX_CONTENT_LENGTH"] = int(float(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024)
 CORS(app)
+metrics.init_app(app)
+tracing.init_app(app)
+
+# Shared pool for running analysis stages side by side within a request
+pipeline_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PIPELINE_MAX_WORKERS", "8")),
+    thread_name_prefix="pipeline"
+)
+
+
+# -------------------- Warm-up --------------------
+# Clients, the fact-check agent and the database are all built on first use,
+# so the app imports quickly and a missing key only breaks the endpoints that
+# need it. WARMUP_ON_START=1 builds them in the background instead, and opens
+# a connection to each upstream so the first requests skip the handshakes.
+STARTED_AT = time.time()
+_warmup = {"state": "disabled", "steps": {}, "ms": None}
+_warmup_lock = threading.Lock()
+
+
+def _origin(url):
+    from urllib.parse import urlsplit
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _warm_upstream(name, url):
+    from services.clients import get_http_session, get_timeout
+    get_http_session(name).head(url, timeout=get_timeout(name))
+
+
+def _warm_openai():
+    from services.clients import get_openai_client
+    for key in {k for k in (os.getenv("OPENAI_API_KEY"), os.getenv("OPEN_AI_KEY")) if k}:
+        get_openai_client(key).models.list()
+
+
+def _warm_storage():
+    """Open Snowflake pool connections so the first save/read doesn't pay for them."""
+    from services.snowflake_service import get_debate_backend
+    get_debate_backend().prewarm()
+
+
+def _warm_caches():
+    from services.debate_cache import get_debate_store
+    from services.search_cache import get_search_cache
+    from services.sentence_cache import get_sentence_cache
+    from services.transcript_cache import get_transcript_cache
+    from services.verdict_cache import get_verdict_cache
+    get_debate_store(), get_search_cache(), get_verdict_cache(), get_sentence_cache(), get_transcript_cache()
+
+
+def _warmup_steps():
+    steps = []
+    if keys_configured():
+        steps.append(("factchecker", get_agent))
+        steps.append(("google", lambda: _warm_upstream("google", _origin(GOOGLE_SEARCH_URL))))
+    if os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_KEY"):
+        steps.append(("openai", _warm_openai))
+    if os.getenv("ELEVENLABS_API_KEY"):
+        from services.transcription import _get_stt_url
+        steps.append(("elevenlabs", lambda: _warm_upstream("elevenlabs", _origin(_get_stt_url()))))
+    steps.append(("storage", _warm_storage))
+    steps.append(("caches", _warm_caches))
+    return steps
+
+
+def warmup(only=None):
+    """
+    Build clients and open upstream/database connections ahead of traffic.
+    Failures are recorded per step (see /readyz) and never raised.
+    """
+    with _warmup_lock:
+        if _warmup["state"] == "running":
+            return _warmup
+        _warmup.update(state="running", steps={}, ms=None)
+    start = time.perf_counter()
+    failed = False
+    for name, step in _warmup_steps():
+        if only is not None and name not in only:
+            continue
+        step_start = time.perf_counter()
+        try:
+            step()
+            _warmup["steps"][name] = {"ok": True, "ms": _elapsed_ms(step_start)}
+        except Exception as e:
+            failed = True
+            _warmup["steps"][name] = {"ok": False, "ms": _elapsed_ms(step_start), "error": str(e)}
+            print(f"⚠️  Warm-up step '{name}' failed: {e}")
+    _warmup.update(state="failed" if failed else "done", ms=_elapsed_ms(start))
+    print(f"🔥 Warm-up {_warmup['state']} in {_warmup['ms']}ms")
+    return _warmup
+
+
+def _start_warmup(only=None):
+    _warmup["state"] = "pending"
+    threading.Thread(target=warmup, args=(only,), name="warmup", daemon=True).start()
+
+
+# Write-behind saves: start the flusher now so debates journaled before a restart are replayed
+if write_behind_enabled():
+    get_save_queue().start()
+
+
+def _assign_fallacy_ids(fallacies):
+    for f in fallacies:
+        if "id" not in f:
+            f["id"] = str(uuid.uuid4())
+    return fallacies
+
+
+def _format_factchecks(results, text):
+    """Convert FactCheckerAgent results into the frontend's factChecks format."""
+    factchecks_out = []
+    verdict_map = {"true": "verified", "false": "false", "unknown": "unverifiable"}
+
+    for res in results:
+        # Only include statements that were judged explicitly false
+        verdict_raw = res.get("verdict", "unknown").lower()
+        if verdict_raw != "false":
+            continue
+
+        verdict = verdict_map.get(verdict_raw, "false")
+        sources = []
+        for ev in res.get("evidence", []):
+            if isinstance(ev, dict):
+                for item in ev.get("results", []):
+                    sources.append({
+                        "title": item.get("title", ""),
+                        "url": item.get("link", ""),
+                        "snippet": item.get("snippet", "")
+                    })
+
+        factchecks_out.append({
+            "id": str(uuid.uuid4()),
+            "claim": res.get("statement", text),
+            "verdict": verdict,
+            "explanation": res.get("explanation", ""),
+            "confidence": 85,
+            "sources": sources or None
+        })
+
+    return factchecks_out
+
+
+def _check_text(text):
+    # The agent is built on first use, so a missing key fails this stage, not the request
+    return get_agent().check_text(text)
+
+
+def _timed(fn, *args):
+    """Run fn(*args) and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _audio_timings(audio_info, elapsed_ms):
+    """Split transcribe_audio's elapsed time into normalization and STT."""
+    normalize_ms = audio_info.get("normalize_ms", 0.0)
+    return {"normalize_ms": normalize_ms, "transcribe_ms": round(elapsed_ms - normalize_ms, 1)}
+
+
+def _stream_events(events):
+    """
+    Stream an iterable of event dicts (each with an "event" name).
+    Sends Server-Sent Events when the client asks for text/event-stream
+    (or ?format=sse), otherwise newline-delimited JSON.
+    """
+    use_sse = (request.args.get("format") == "sse"
+               or "text/event-stream" in request.headers.get("Accept", ""))
+
+    def generate():
+        for event in events:
+            payload = json.dumps(event, default=str)
+            if use_sse:
+                yield f"event: {event.get('event', 'message')}\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _factcheck_events(text, start):
+    """Event stream for fact-checking: claims, one event per verdict, then a summary."""
+    total = flagged = 0
+    try:
+        for ev in get_agent().iter_check_text(text):
+            if ev["type"] == "claims":
+                total = len(ev["statements"])
+                yield {"event": "claims", "claims": ev["statements"], "elapsed_ms": _elapsed_ms(start)}
+                continue
+            res = ev["result"]
+            formatted = _format_factchecks([res], text)
+            flagged += len(formatted)
+            yield {
+                "event": "factcheck",
+                "index": ev["index"],
+                "claim": res.get("statement", ""),
+                "verdict": res.get("verdict", "unknown"),
+                "factCheck": formatted[0] if formatted else None,
+                "elapsed_ms": _elapsed_ms(start)
+            }
+    except Exception as e:
+        traceback.print_exc()
+        yield {"event": "error", "stage": "factcheck", "error": str(e)}
+    yield {"event": "factcheck_done", "claims": total, "false": flagged, "elapsed_ms": _elapsed_ms(start)}
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] / (1024 * 1024)
+    return jsonify({"error": f"Upload too large (limit {limit_mb:g} MB)"}), 413
+
+# -------------------- Health --------------------
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving. Never touches upstreams."""
+    return jsonify({"status": "ok", "pid": os.getpid(), "uptime_s": round(time.time() - STARTED_AT, 1)})
 
-# Initialize FactCheckerAgent
-agent = FactCheckerAgent()
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    Readiness: which subsystems are configured and initialized in this
+    worker. 503 while warm-up is running, or (with ?strict=1) if any
+    subsystem is not configured.
+    """
+    from services import clients
+    from services.snowflake_service import storage_status
+
+    built = clients.status()
+    subsystems = {
+        "factchecker": {"configured": keys_configured(), "initialized": agent_initialized()},
+        "fallacies": {"configured": bool(os.getenv("OPENAI_API_KEY") and os.getenv("OPENAI_MODEL_ID")),
+                      "initialized": built["openai_clients"] > 0},
+        "transcription": {"configured": bool(os.getenv("ELEVENLABS_API_KEY")),
+                          "initialized": "elevenlabs" in built["http_sessions"]},
+        "storage": storage_status(),
+    }
+    if write_behind_enabled():
+        subsystems["save_queue"] = {"configured": True, "initialized": get_save_queue().stats()["flusher_running"]}
+
+    ready = _warmup["state"] not in ("pending", "running")
+    if request.args.get("strict") == "1":
+        ready = ready and all(sub["configured"] for sub in subsystems.values())
+    body = {
+        "ready": ready,
+        "warmup": _warmup,
+        "subsystems": subsystems,
+        "clients": built,
+    }
+    return jsonify(body), 200 if ready else 503
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint (per worker process)."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 # -------------------- Test --------------------
 @app.route("/api/test", methods=["GET"])
@@ -34,11 +315,12 @@ def transcribe():
         return jsonify({"error": "Empty filename"}), 400
 
     try:
-      audio_bytes = file.read()
+      # The upload stays in its spooled file; it's never copied into memory whole
+      audio = file.stream
       mime_type = file.mimetype or "application/octet-stream"
-      print(f"\n🎤 Transcribing audio: {len(audio_bytes)} bytes, type: {mime_type}")
+      print(f"\n🎤 Transcribing audio: {source_size(audio)} bytes, type: {mime_type}")
 
-      transcript = transcribe_audio(audio_bytes=audio_bytes, mime_type=mime_type)
+      transcript = transcribe_audio(audio_bytes=audio, mime_type=mime_type)
       print(f"✅ Transcription successful: {transcript[:100]}...")
       return jsonify({"transcript": transcript})
     except ValueError as ve:
@@ -61,7 +343,7 @@ def analyze_audio():
         return jsonify({"error": "Empty filename"}), 400
 
     try:
-        result = analyze_audio_to_json(file.read(), mime_type=file.mimetype or "audio/wav")
+        result = analyze_audio_to_json(file.stream, mime_type=file.mimetype or "audio/wav")
         return jsonify(result)
     except Exception:
         traceback.print_exc()
@@ -91,10 +373,7 @@ def detect_fallacies():
 
     try:
         result = generate_json_from_text(transcript)
-        fallacies = result.get("fallacies", [])
-        for f in fallacies:
-            if "id" not in f:
-                f["id"] = str(uuid.uuid4())
+        fallacies = _assign_fallacy_ids(result.get("fallacies", []))
         return jsonify({"fallacies": fallacies})
     except Exception:
         traceback.print_exc()
@@ -109,42 +388,184 @@ def factcheck():
         if not text.strip():
             return jsonify({"error": "No text/statement provided"}), 400
 
-        results = agent.check_text(text)
+        results = get_agent().check_text(text)
+        factchecks_out = _format_factchecks(results, text)
 
-        factchecks_out = []
-        verdict_map = {"true": "verified", "false": "false", "unknown": "unverifiable"}
+        return jsonify({"factChecks": factchecks_out})
 
-        for res in results:
-            # Only include statements that were judged explicitly false
-            verdict_raw = res.get("verdict", "unknown").lower()
-            if verdict_raw != "false":
-                continue
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e), "statement": text, "result": "error"}), 500
 
-            verdict = verdict_map.get(verdict_raw, "false")
-            sources = []
-            for ev in res.get("evidence", []):
-                if isinstance(ev, dict):
-                    for item in ev.get("results", []):
-                        sources.append({
-                            "title": item.get("title", ""),
-                            "url": item.get("link", ""),
-                            "snippet": item.get("snippet", "")
-                        })
-
-            factchecks_out.append({
-                "id": str(uuid.uuid4()),
-                "claim": res.get("statement", text),
-                "verdict": verdict,
-                "explanation": res.get("explanation", ""),
-                "confidence": 85,
-                "sources": sources or None
-            })
+@app.route("/api/factcheck/stream", methods=["POST"])
+def factcheck_stream():
+    """
+    Streaming /api/factcheck. Emits "claims" with the extracted statements,
+    then a "factcheck" event as each verdict completes, then "summary".
+    """
+    data = request.get_json(silent=True) or {}
+    text = data.get("text") or data.get("statement", "")
+    if not text.strip():
+        return jsonify({"error": "No text/statement provided"}), 400
 
-        return jsonify({"factChecks": factchecks_out})
+    def events():
+        start = time.perf_counter()
+        for ev in _factcheck_events(text, start):
+            if ev["event"] == "factcheck_done":
+                ev["event"] = "summary"
+            yield ev
+
+    return _stream_events(events())
 
+# -------------------- Full Turn (upload once) --------------------
+@app.route("/api/turn", methods=["POST"])
+def analyze_turn():
+    """
+    Transcribe an uploaded turn, then run fallacy detection and fact-checking
+    concurrently. Returns everything the client needs for one turn:
+    { transcript, fallacies, factChecks, timings }
+    """
+    if "audio" not in request.files:
+        return jsonify({"error": "Missing 'audio' file"}), 400
+
+    file = request.files["audio"]
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    request_start = time.perf_counter()
+    timings = {}
+    try:
+        mime_type = file.mimetype or "application/octet-stream"
+        print(f"\n🎤 Turn upload: {source_size(file.stream)} bytes, type: {mime_type}")
+        audio_info = {}
+        transcript, elapsed_ms = _timed(transcribe_audio, file.stream, mime_type, True, audio_info)
+        timings.update(_audio_timings(audio_info, elapsed_ms))
+    except ValueError as ve:
+        print(f"❌ Transcription validation error: {ve}")
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
+        print(f"❌ Transcription failed: {e}")
         traceback.print_exc()
-        return jsonify({"error": str(e), "statement": text, "result": "error"}), 500
+        return jsonify({"error": f"Transcription failed: {str(e)}"}), 500
+
+    analysis_start = time.perf_counter()
+    fallacy_future = pipeline_executor.submit(tracing.in_context(_timed), generate_json_from_text, transcript)
+    factcheck_future = pipeline_executor.submit(tracing.in_context(_timed), _check_text, transcript)
+
+    errors = {}
+    fallacies = []
+    try:
+        result, timings["fallacies_ms"] = fallacy_future.result()
+        fallacies = _assign_fallacy_ids(result.get("fallacies", []))
+    except Exception as e:
+        traceback.print_exc()
+        errors["fallacies"] = str(e)
+
+    factchecks_out = []
+    try:
+        results, timings["factcheck_ms"] = factcheck_future.result()
+        factchecks_out = _format_factchecks(results, transcript)
+    except Exception as e:
+        traceback.print_exc()
+        errors["factcheck"] = str(e)
+
+    timings["analysis_ms"] = round((time.perf_counter() - analysis_start) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - request_start) * 1000, 1)
+    print(f"✅ Turn analyzed in {timings['total_ms']} ms: "
+          f"{len(fallacies)} fallacies, {len(factchecks_out)} fact checks")
+
+    response = {
+        "transcript": transcript,
+        "fallacies": fallacies,
+        "factChecks": factchecks_out,
+        "timings": timings,
+        "audio": {"bytes_in": audio_info["bytes_in"], "bytes_out": audio_info["bytes_out"],
+                  "method": audio_info["method"]}
+    }
+    if errors:
+        response["errors"] = errors
+    return jsonify(response)
+
+@app.route("/api/turn/stream", methods=["POST"])
+def analyze_turn_stream():
+    """
+    Streaming /api/turn. Emits "transcript", then "fallacies" and the
+    fact-check events ("claims", one "factcheck" per verdict) as each is
+    ready, then a final "summary" with per-stage timings.
+    """
+    if "audio" not in request.files:
+        return jsonify({"error": "Missing 'audio' file"}), 400
+
+    file = request.files["audio"]
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    upload = file.stream
+    mime_type = file.mimetype or "application/octet-stream"
+    print(f"\n🎤 Turn upload (stream): {source_size(upload)} bytes, type: {mime_type}")
+
+    def events():
+        request_start = time.perf_counter()
+        timings = {}
+        try:
+            audio_info = {}
+            transcript, elapsed_ms = _timed(transcribe_audio, upload, mime_type, True, audio_info)
+            timings.update(_audio_timings(audio_info, elapsed_ms))
+        except Exception as e:
+            traceback.print_exc()
+            yield {"event": "error", "stage": "transcribe", "error": str(e)}
+            return
+        yield {"event": "transcript", "transcript": transcript, "elapsed_ms": _elapsed_ms(request_start),
+               "audio": {"bytes_in": audio_info["bytes_in"], "bytes_out": audio_info["bytes_out"],
+                         "method": audio_info["method"]}}
+
+        # Both stages push onto one queue so whichever finishes first is sent first
+        outbox = queue.Queue()
+        stage_done = object()
+        counts = {"claims": 0, "false": 0}
+        analysis_start = time.perf_counter()
+
+        def run_fallacies():
+            try:
+                result, timings["fallacies_ms"] = _timed(generate_json_from_text, transcript)
+                outbox.put({
+                    "event": "fallacies",
+                    "fallacies": _assign_fallacy_ids(result.get("fallacies", [])),
+                    "elapsed_ms": _elapsed_ms(request_start)
+                })
+            except Exception as e:
+                traceback.print_exc()
+                outbox.put({"event": "error", "stage": "fallacies", "error": str(e)})
+            finally:
+                outbox.put(stage_done)
+
+        def run_factchecks():
+            try:
+                for ev in _factcheck_events(transcript, request_start):
+                    if ev["event"] == "factcheck_done":
+                        timings["factcheck_ms"] = _elapsed_ms(analysis_start)
+                        counts.update(claims=ev["claims"], false=ev["false"])
+                    else:
+                        outbox.put(ev)
+            finally:
+                outbox.put(stage_done)
+
+        pipeline_executor.submit(tracing.in_context(run_fallacies))
+        pipeline_executor.submit(tracing.in_context(run_factchecks))
+
+        pending = 2
+        while pending:
+            ev = outbox.get()
+            if ev is stage_done:
+                pending -= 1
+                continue
+            yield ev
+
+        timings["analysis_ms"] = _elapsed_ms(analysis_start)
+        timings["total_ms"] = _elapsed_ms(request_start)
+        yield {"event": "summary", **counts, "timings": timings}
+
+    return _stream_events(events())
 
 # Save debate summary to database
 @app.route("/api/save_debate", methods=["POST"])
@@ -180,10 +601,22 @@ def save_debate():
             print("ERROR: No JSON data received")
             return jsonify({'error': 'No data provided'}), 400
         
-        # Import snowflake service
-        from services.snowflake_service import get_snowflake_service
+        if write_behind_enabled():
+            # Journal locally and let the background flusher write to the database
+            entry = get_save_queue().enqueue(data)
+            print(f"📝 Debate {entry['debate_id']} queued for saving")
+            return jsonify({
+                'success': True,
+                'message': 'Debate queued for saving',
+                'debate_id': entry['debate_id'],
+                'status': entry['status'],
+                'status_url': f"/api/save_debate/status/{entry['debate_id']}"
+            }), 202
+        
+        # Import debate store (Snowflake behind a read-through cache)
+        from services.debate_cache import get_debate_store
         
-        db_service = get_snowflake_service()
+        db_service = get_debate_store()
         
         # Save to database
         success = db_service.save_debate_summary(data)
@@ -207,14 +640,35 @@ def save_debate():
             'success': False
         }), 500
 
+# Write-behind save status
+@app.route("/api/save_debate/status", methods=["GET"])
+def save_queue_status():
+    """Write-behind journal: counts per status, oldest pending age, last flush."""
+    stats = get_save_queue().stats()
+    stats["mode"] = "write_behind" if write_behind_enabled() else "sync"
+    return jsonify(stats)
+
+@app.route("/api/save_debate/status/<debate_id>", methods=["GET"])
+def save_status(debate_id):
+    """Flush status of one queued debate (pending, flushing, saved or failed)."""
+    status = get_save_queue().status(debate_id)
+    if status is None:
+        return jsonify({'error': 'Debate not in save queue'}), 404
+    return jsonify(status)
+
+@app.route("/api/save_debate/retry", methods=["POST"])
+def save_queue_retry():
+    """Re-queue debates that ran out of save attempts."""
+    return jsonify({'requeued': get_save_queue().retry_failed()})
+
 # Retrieve a saved debate summary
 @app.route("/api/get_debate/<debate_id>", methods=["GET"])
 def get_debate(debate_id):
     """Retrieve a saved debate summary by ID."""
     try:
-        from services.snowflake_service import get_snowflake_service
+        from services.debate_cache import get_debate_store
         
-        db_service = get_snowflake_service()
+        db_service = get_debate_store()
         debate = db_service.get_debate_summary(debate_id)
         
         if debate:
@@ -230,44 +684,65 @@ def get_debate(debate_id):
 # List all saved debates
 @app.route("/api/list_debates", methods=["GET"])
 def list_debates():
-    """List all saved debates."""
+    """
+    List saved debates, newest first, one page at a time.
+    Query params: limit (max 200), cursor (next_cursor from the previous
+    page), include_summary=1 to also return the summary text.
+    """
     try:
-        limit = request.args.get('limit', 50, type=int)
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        cursor = request.args.get('cursor') or None
+        include_summary = request.args.get('include_summary', '0').lower() in ('1', 'true', 'yes')
         
-        from services.snowflake_service import get_snowflake_service
+        from services.debate_cache import get_debate_store
         
-        db_service = get_snowflake_service()
-        debates = db_service.list_debates(limit=limit)
+        db_service = get_debate_store()
+        page = db_service.list_debates_page(limit=limit, cursor=cursor, include_summary=include_summary)
         
-        return jsonify({'debates': debates})
+        return jsonify(page)
         
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         print(f"ERROR listing debates: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# Connection pool metrics
+@app.route("/api/db/pool", methods=["GET"])
+def db_pool_stats():
+    """Storage backend connection pool metrics (wait time, in-use count, reconnects)."""
+    from services.snowflake_service import get_debate_backend
+    return jsonify(get_debate_backend().pool_stats())
+
+# Cache hit rates
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss statistics for the debate, search, verdict, fallacy and transcript caches."""
+    from services.debate_cache import get_debate_store
+    from services.search_cache import get_search_cache
+    from services.sentence_cache import get_sentence_cache
+    from services.transcript_cache import get_transcript_cache
+    from services.verdict_cache import get_verdict_cache
+
+    store = get_debate_store()
+    stats = {"debates": store.cache_stats() if hasattr(store, "cache_stats") else None}
+    for name, cache in (("search", get_search_cache()),
+                        ("verdicts", get_verdict_cache()),
+                        ("fallacy_sentences", get_sentence_cache()),
+                        ("transcripts", get_transcript_cache())):
+        stats[name] = cache.stats() if cache is not None else None
+    return jsonify(stats)
+
 # -------------------- Generate Summary --------------------
-@app.route("/api/generate-summary", methods=["POST", "OPTIONS"])
-def generate_summary():
-    """Generate AI summary of key arguments from transcript"""
-    # Handle CORS preflight
-    if request.method == "OPTIONS":
-        return jsonify({}), 200
-        
-    try:
-        data = request.get_json(silent=True) or {}
-        transcript = data.get("transcript", "")
-        speaker = data.get("speaker", "Unknown")
-        
-        if not transcript or not transcript.strip():
-            return jsonify({"error": "Missing transcript"}), 400
-        
-        print(f"\n📝 Generating summary for {speaker}...")
-        
-        import os
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_KEY"))
-        
+def _generate_summary_text(transcript, speaker="Unknown"):
+    """Summarize a speaker's key arguments with gpt-4o-mini (markdown)."""
+    print(f"\n📝 Generating summary for {speaker}...")
+
+    from services.clients import get_openai_client
+    client = get_openai_client(os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_KEY"))
+
+    with upstream("openai", "summary"):
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
@@ -293,10 +768,29 @@ def generate_summary():
             temperature=0.3,
             max_tokens=300
         )
+    record_openai_usage(response, "summary")
+
+    summary = response.choices[0].message.content
+    print(f"✅ Summary generated: {len(summary)} chars")
+    return summary
+
+
+@app.route("/api/generate-summary", methods=["POST", "OPTIONS"])
+def generate_summary():
+    """Generate AI summary of key arguments from transcript"""
+    # Handle CORS preflight
+    if request.method == "OPTIONS":
+        return jsonify({}), 200
         
-        summary = response.choices[0].message.content
-        print(f"✅ Summary generated: {len(summary)} chars")
+    try:
+        data = request.get_json(silent=True) or {}
+        transcript = data.get("transcript", "")
+        speaker = data.get("speaker", "Unknown")
+        
+        if not transcript or not transcript.strip():
+            return jsonify({"error": "Missing transcript"}), 400
         
+        summary = _generate_summary_text(transcript, speaker)
         return jsonify({"summary": summary})
         
     except Exception as e:
@@ -304,6 +798,105 @@ def generate_summary():
         traceback.print_exc()
         return jsonify({"error": f"Failed to generate summary: {str(e)}"}), 500
 
+# -------------------- Async Jobs --------------------
+def _factcheck_job(text):
+    return {"factChecks": _format_factchecks(get_agent().check_text(text), text)}
+
+
+def _fallacies_job(transcript):
+    result = generate_json_from_text(transcript)
+    return {"fallacies": _assign_fallacy_ids(result.get("fallacies", []))}
+
+
+def _summary_job(transcript, speaker):
+    return {"summary": _generate_summary_text(transcript, speaker)}
+
+
+def _job_response(job):
+    job_id = job["job_id"]
+    body = {
+        "job_id": job_id,
+        "kind": job["kind"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "trace_id": job.get("trace_id"),
+        "status_url": f"/api/jobs/{job_id}",
+        "result_url": f"/api/jobs/{job_id}/result"
+    }
+    if job["error"]:
+        body["error"] = job["error"]
+    return body
+
+
+@app.route("/api/jobs/<kind>", methods=["POST"])
+def submit_job(kind):
+    """
+    Submit a long-running analysis and return 202 with a job ID right away.
+    kind is one of: factcheck, fallacies, generate-summary. The JSON body is
+    the same as for the matching synchronous endpoint.
+    """
+    from services.jobs import JobQueueFullError, get_job_store
+
+    data = request.get_json(silent=True) or {}
+    if kind == "factcheck":
+        text = data.get("text") or data.get("statement", "")
+        if not text.strip():
+            return jsonify({"error": "No text/statement provided"}), 400
+        fn, args = _factcheck_job, (text,)
+    elif kind == "fallacies":
+        transcript = data.get("transcript", "")
+        if not transcript:
+            return jsonify({"error": "Missing 'transcript'"}), 400
+        fn, args = _fallacies_job, (transcript,)
+    elif kind == "generate-summary":
+        transcript = data.get("transcript", "")
+        if not transcript or not transcript.strip():
+            return jsonify({"error": "Missing transcript"}), 400
+        fn, args = _summary_job, (transcript, data.get("speaker", "Unknown"))
+    else:
+        return jsonify({"error": f"Unknown job type '{kind}'"}), 404
+
+    try:
+        job = get_job_store().submit(kind, fn, *args)
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(_job_response(job)), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Poll a job's status."""
+    from services.jobs import get_job_store
+
+    job = get_job_store().get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(_job_response(job))
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    """Fetch a job's result: 200 when done, 202 while pending, 500 if it failed."""
+    from services.jobs import get_job_store
+
+    job = get_job_store().get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found or expired"}), 404
+    if job["status"] == "succeeded":
+        return jsonify(job["result"])
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"], "job_id": job_id}), 500
+    return jsonify(_job_response(job)), 202
+
+# Started once the whole module (and every route) is defined
+if os.getenv("WARMUP_ON_START", "0") == "1":
+    _start_warmup()
+elif os.getenv("SNOWFLAKE_POOL_PREWARM", "1") == "1" and os.getenv("SNOWFLAKE_ACCOUNT"):
+    # Pre-warm just the database pool, as before
+    _start_warmup(only={"storage"})
+
 # -------------------- Run Server --------------------
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
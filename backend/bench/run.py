@@ -0,0 +1,440 @@
+"""
+Offline load test for the backend.
+
+Starts stub OpenAI, Google and ElevenLabs servers (bench/stubs.py) and the
+backend (bench/serve.py, SQLite standing in for Snowflake) pointed at them,
+then drives each endpoint at a fixed concurrency and reports throughput
+and latency percentiles as JSON. No real API quota is used.
+
+    cd backend
+    python -m bench.run --concurrency 16 --requests 200 --output results.json
+    python -m bench.run --baseline results.json     # exit 1 on regression
+
+To benchmark a backend you started yourself (--target), give the stubs
+fixed ports. The run prints the backend's environment (stub URLs,
+LIBRA_STORAGE_BACKEND=sqlite, SQLITE_DB_PATH, PORT...) and waits for it;
+start it with that environment through bench/serve.py, which installs the
+latency-injecting SQLite store:
+
+    python -m bench.run --stub-ports 9101,9102,9103 --target http://127.0.0.1:5001
+    python -m bench.serve        # or: gunicorn -c gunicorn_conf.py bench.serve:app
+
+Latencies are LatencyModel specs in ms: "250", "uniform:100:400",
+"normal:300:50" or "lognormal:300:0.4" (median, sigma).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from bench.stubs import TRANSCRIPT, ElevenLabsStub, GoogleSearchStub, OpenAIStub, StubServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ("transcribe", "fallacies", "factcheck", "generate-summary", "save_debate")
+
+# Relative change that counts as a regression in --baseline comparisons
+DEFAULT_TOLERANCE = 0.15
+
+
+# -------------------- payloads --------------------
+def _make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    """Mono 16-bit speech-like audio: bursts of tone separated by short silences."""
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        t = i / sample_rate
+        voiced = (t % 1.2) < 0.9
+        value = int(8000 * ((i * 220 // sample_rate) % 2 * 2 - 1)) if voiced else 0
+        frames += struct.pack("<h", value)
+    buf = BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def _debate(run_id: str, i: int) -> Dict[str, Any]:
+    turns = []
+    for n, speaker in enumerate(("A", "B"), start=1):
+        turns.append({
+            "turn_number": n,
+            "speaker": speaker,
+            "transcript": TRANSCRIPT,
+            "duration": 60,
+            "fallacies": [{"type": "ad hominem", "explanation": "Attacks the person.",
+                           "text_segment": "My opponent clearly doesn't understand economics", "confidence": 0.9}],
+            "fact_checks": [{"claim": "The Eiffel Tower is in Berlin.", "verdict": "false",
+                             "explanation": "It is in Paris.", "confidence": 0.95,
+                             "sources": [{"title": "Eiffel Tower", "url": "https://example.org/eiffel"}]}],
+        })
+    return {"debate_id": f"bench-{run_id}-{i}", "topic": "Energy policy", "speaker_a": "Alice",
+            "speaker_b": "Bob", "summary": "Benchmark debate", "turns": turns}
+
+
+def build_requests(audio: bytes, run_id: str) -> Dict[str, Callable[[int], Dict[str, Any]]]:
+    """Per endpoint, a function from request number to requests.request() kwargs."""
+    text = lambda i: f"{TRANSCRIPT} Request {i}."  # noqa: E731
+    return {
+        "transcribe": lambda i: {"method": "POST", "url": "/api/transcribe",
+                                 "files": {"audio": (f"clip-{i}.wav", audio, "audio/wav")}},
+        "fallacies": lambda i: {"method": "POST", "url": "/api/fallacies", "json": {"transcript": text(i)}},
+        "factcheck": lambda i: {"method": "POST", "url": "/api/factcheck", "json": {"text": text(i)}},
+        "generate-summary": lambda i: {"method": "POST", "url": "/api/generate-summary",
+                                       "json": {"transcript": text(i), "speaker": "Alice"}},
+        "save_debate": lambda i: {"method": "POST", "url": "/api/save_debate", "json": _debate(run_id, i)},
+    }
+
+
+# -------------------- load --------------------
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_load(base_url: str, make_request: Callable[[int], Dict[str, Any]], concurrency: int,
+             total: Optional[int], duration: Optional[float], timeout: float) -> Dict[str, Any]:
+    """Send requests from `concurrency` threads until `total` are done or `duration` passes."""
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker():
+        session = requests.Session()
+        while True:
+            i = next(counter)
+            if (total is not None and i >= total) or (deadline is not None and time.perf_counter() >= deadline):
+                return
+            kwargs = make_request(i)
+            kwargs["url"] = base_url + kwargs["url"]
+            start = time.perf_counter()
+            try:
+                response = session.request(timeout=timeout, **kwargs)
+                response.content
+                key, failed = str(response.status_code), response.status_code >= 400
+            except requests.RequestException as e:
+                key, failed = type(e).__name__, True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[key] = statuses.get(key, 0) + 1
+                if failed:
+                    errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(latencies)
+    failed = sum(errors.values())
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    return {
+        "requests": count,
+        "errors": failed,
+        "error_rate": round(failed / count, 4) if count else 0.0,
+        "statuses": statuses,
+        "duration_s": round(wall, 3),
+        "throughput_rps": round(count / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "mean": ms(sum(latencies) / count) if count else None,
+            "max": ms(latencies[-1]) if count else None,
+        },
+    }
+
+
+# -------------------- backend --------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(args, env: Dict[str, str], log_path: str):
+    port = _free_port()
+    env = {**env, "PORT": str(port)}
+    if args.server == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "--bind", f"127.0.0.1:{port}",
+               "bench.serve:app"]
+    else:
+        cmd = [sys.executable, "-m", "bench.serve", "--port", str(port)]
+    log = open(log_path, "w")
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {proc.returncode}; see {log_path}")
+        try:
+            if requests.get(base_url + "/healthz", timeout=1).ok:
+                return proc, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"Backend did not become healthy within {args.startup_timeout}s; see {log_path}")
+
+
+def stub_env(stubs: Dict[str, StubServer]) -> Dict[str, str]:
+    """Environment that points a backend's upstream calls at the stubs."""
+    return {
+        "OPENAI_BASE_URL": stubs["openai"].base_url + "/v1",
+        "OPENAI_API_KEY": "bench",
+        "OPEN_AI_KEY": "bench",
+        "OPENAI_MODEL_ID": "ft:bench",
+        "GOOGLE_SEARCH_URL": stubs["google"].base_url + "/customsearch/v1",
+        "GOOGLE_SEARCH_API_KEY": "bench",
+        "CUSTOM_SEARCH_ENGINE_ID": "bench",
+        "ELEVENLABS_STT_URL": stubs["elevenlabs"].base_url + "/v1/speech-to-text",
+        "ELEVENLABS_API_KEY": "bench",
+    }
+
+
+def bench_env(args, stubs: Dict[str, StubServer], workdir: str) -> Dict[str, str]:
+    """Environment a benchmarked backend runs with, on top of the caller's own."""
+    env = stub_env(stubs)
+    env.update({
+        "LIBRA_STORAGE_BACKEND": "sqlite",
+        "SQLITE_DB_PATH": os.path.join(workdir, "bench.sqlite3"),
+        "LIBRA_CACHE_DIR": os.path.join(workdir, "cache"),
+        "BENCH_DB_LATENCY": args.snowflake_latency,
+        "BENCH_DB_ERROR_RATE": str(args.snowflake_errors),
+        "SNOWFLAKE_POOL_PREWARM": "0",
+        "PYTHONUNBUFFERED": "1",
+    })
+    if not args.caches:
+        # Every request should pay for its upstream calls
+        for name in ("SEARCH_CACHE_ENABLED", "VERDICT_CACHE_ENABLED", "FALLACY_CACHE_ENABLED",
+                     "TRANSCRIPT_CACHE_ENABLED", "DEBATE_CACHE_ENABLED"):
+            env[name] = "0"
+    for item in args.backend_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def wait_for_target(args, env: Dict[str, str]) -> str:
+    """Print how to start the backend for a --target run, then wait for it to come up."""
+    base_url = args.target.rstrip("/")
+    env = {**env, "PORT": str(urlparse(base_url).port or 5001)}
+    print("Start the backend from backend/ with this environment:", file=sys.stderr)
+    for key, value in env.items():
+        print(f"  {key}={value}", file=sys.stderr)
+    print("using bench.serve, which puts the latency-injecting SQLite store behind it:", file=sys.stderr)
+    print("  python -m bench.serve", file=sys.stderr)
+    print("  gunicorn -c gunicorn_conf.py bench.serve:app", file=sys.stderr)
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + "/healthz", timeout=1).ok:
+                return base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base_url} did not become healthy within {args.startup_timeout}s")
+
+
+# -------------------- results --------------------
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions against a previous run: slower p95/p99, lower throughput or more errors."""
+    problems = []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        for pct in ("p95", "p99"):
+            old, new = before["latency_ms"].get(pct), current["latency_ms"].get(pct)
+            if old and new and new > old * (1 + tolerance):
+                problems.append(f"{name}: {pct} {old}ms -> {new}ms (+{(new / old - 1) * 100:.0f}%)")
+        old, new = before["throughput_rps"], current["throughput_rps"]
+        if old and new < old * (1 - tolerance):
+            problems.append(f"{name}: throughput {old} -> {new} req/s ({(new / old - 1) * 100:.0f}%)")
+        if current["error_rate"] > before["error_rate"] + 0.01:
+            problems.append(f"{name}: error rate {before['error_rate']} -> {current['error_rate']}")
+    return problems
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    print(f"\n{'endpoint':<18}{'reqs':>7}{'err%':>7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)",
+          file=sys.stderr)
+    for name, r in results["endpoints"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<18}{r['requests']:>7}{r['error_rate'] * 100:>7.1f}{r['throughput_rps']:>9}"
+              f"{lat['p50'] or 0:>9}{lat['p95'] or 0:>9}{lat['p99'] or 0:>9}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the backend against local stub upstreams")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--duration", type=float, help="seconds per endpoint (instead of --requests)")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint first")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--server", choices=("werkzeug", "gunicorn"), default="werkzeug",
+                        help="how to run the backend (gunicorn uses gunicorn_conf.py and WEB_* settings)")
+    parser.add_argument("--target", help="benchmark an already running backend at this URL instead "
+                                         "(start it with the stub environment; see --stub-ports)")
+    parser.add_argument("--stub-host", default="127.0.0.1",
+                        help="address the stubs listen on (0.0.0.0 to reach them from another machine)")
+    parser.add_argument("--stub-ports", default="0,0,0", metavar="OPENAI,GOOGLE,ELEVENLABS",
+                        help="ports for the stubs; 0 picks a free one (fixed ports are needed with --target)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--caches", action="store_true", help="leave the backend's caches enabled")
+    parser.add_argument("--backend-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the backend (repeatable)")
+    parser.add_argument("--audio-seconds", type=float, default=5.0, help="length of the uploaded clip")
+    parser.add_argument("--openai-latency", default="lognormal:600:0.35")
+    parser.add_argument("--openai-errors", type=float, default=0.0, help="fraction of calls answered with 500")
+    parser.add_argument("--google-latency", default="lognormal:250:0.3")
+    parser.add_argument("--google-errors", type=float, default=0.0)
+    parser.add_argument("--elevenlabs-latency", default="lognormal:900:0.3")
+    parser.add_argument("--elevenlabs-errors", type=float, default=0.0)
+    parser.add_argument("--snowflake-latency", default="lognormal:120:0.4",
+                        help="delay added to each storage call (SQLite stands in for Snowflake)")
+    parser.add_argument("--snowflake-errors", type=float, default=0.0)
+    parser.add_argument("--claims", type=int, default=3, help="claims the stub extracts per fact-check")
+    parser.add_argument("--search-rate", type=float, default=0.3,
+                        help="chance the stub asks for another search before a verdict")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown allowed before --baseline reports a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+    try:
+        openai_port, google_port, elevenlabs_port = (int(p) for p in args.stub_ports.split(","))
+    except ValueError:
+        raise SystemExit("--stub-ports takes three comma-separated ports: OPENAI,GOOGLE,ELEVENLABS")
+    if args.target and 0 in (openai_port, google_port, elevenlabs_port):
+        raise SystemExit("--target needs fixed --stub-ports so the backend can be pointed at the stubs")
+
+    stubs = {
+        "openai": StubServer(OpenAIStub(args.openai_latency, args.openai_errors, claims=args.claims,
+                                        search_rate=args.search_rate), args.stub_host, openai_port).start(),
+        "google": StubServer(GoogleSearchStub(args.google_latency, args.google_errors),
+                             args.stub_host, google_port).start(),
+        "elevenlabs": StubServer(ElevenLabsStub(args.elevenlabs_latency, args.elevenlabs_errors),
+                                 args.stub_host, elevenlabs_port).start(),
+    }
+    workdir = tempfile.mkdtemp(prefix="libra-bench-")
+    log_path = os.path.join(workdir, "backend.log")
+    env = bench_env(args, stubs, workdir)
+    proc = None
+    try:
+        if args.target:
+            base_url = wait_for_target(args, env)
+        else:
+            proc, base_url = start_backend(args, {**os.environ, **env}, log_path)
+
+        run_id = uuid.uuid4().hex[:8]
+        payloads = build_requests(_make_wav(args.audio_seconds), run_id)
+        results: Dict[str, Any] = {"endpoints": {}}
+        for name in endpoints:
+            print(f"▶ {name}: {args.concurrency} clients, "
+                  f"{f'{args.duration}s' if args.duration else f'{args.requests} requests'}", file=sys.stderr)
+            if args.warmup:
+                warm = build_requests(b"", run_id + "w")[name] if name == "save_debate" else payloads[name]
+                run_load(base_url, warm, min(args.concurrency, args.warmup), args.warmup, None, args.timeout)
+            results["endpoints"][name] = run_load(
+                base_url, payloads[name], args.concurrency,
+                None if args.duration else args.requests, args.duration, args.timeout,
+            )
+
+        results["upstreams"] = {name: server.upstream.stats() for name, server in stubs.items()}
+        results["upstreams"]["snowflake"] = {"latency": args.snowflake_latency, "error_rate": args.snowflake_errors,
+                                             "stand_in": "sqlite"}
+        results["meta"] = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "server": "external" if args.target else args.server,
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": None if args.duration else args.requests,
+            "duration_per_endpoint_s": args.duration,
+            "caches": args.caches,
+            "backend_env": args.backend_env,
+            "backend_log": None if args.target else log_path,
+        }
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        for server in stubs.values():
+            server.stop()
+
+    print_table(results)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        if problems:
+            print("\n❌ Regressions against baseline:", file=sys.stderr)
+            for problem in problems:
+                print(f"  {problem}", file=sys.stderr)
+            return 1
+        print("\n✅ No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Backend entry point for benchmarks.
+
+The normal WSGI app, with the SQLite storage backend standing in for
+Snowflake behind a wrapper that adds a delay and random failures to every
+storage call (BENCH_DB_LATENCY, a LatencyModel spec in ms, and
+BENCH_DB_ERROR_RATE). Started by bench/run.py, or by hand:
+
+    python -m bench.serve --port 5001
+    gunicorn -c gunicorn_conf.py bench.serve:app
+"""
+import argparse
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bench.stubs import LatencyModel
+from services import snowflake_service
+from services.debate_store import DebateStore
+from services.sqlite_service import SQLiteDebateService
+
+
+class SlowDebateStore(DebateStore):
+    """A debate store that sleeps (and sometimes fails) before each call, like a remote database."""
+
+    def __init__(self, backend: DebateStore, latency: str = "0", error_rate: float = 0.0):
+        self.backend = backend
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+
+    def _round_trip(self, operation: str) -> None:
+        time.sleep(self.latency.sample())
+        if random.random() < self.error_rate:
+            raise RuntimeError(f"storage stub: injected failure in {operation}")
+
+    def init_schema(self):
+        self.backend.init_schema()
+
+    def save_debate_summary(self, debate_data: Dict[str, Any]) -> bool:
+        return self.save_debate_summaries([debate_data])
+
+    def save_debate_summaries(self, debates: List[Dict[str, Any]]) -> bool:
+        self._round_trip("save")
+        return self.backend.save_debate_summaries(debates)
+
+    def get_debate_summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        self._round_trip("get")
+        return self.backend.get_debate_summary(debate_id)
+
+    def list_debates(self, limit: int = 50, after: Optional[Tuple[str, str]] = None,
+                     include_summary: bool = False) -> List[Dict[str, Any]]:
+        self._round_trip("list")
+        return self.backend.list_debates(limit=limit, after=after, include_summary=include_summary)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {**self.backend.pool_stats(), "stub_latency": self.latency.spec, "stub_error_rate": self.error_rate}
+
+
+# Installed before anything asks for the storage service, which is created lazily
+snowflake_service._debate_backend = SlowDebateStore(
+    SQLiteDebateService(),
+    latency=os.getenv("BENCH_DB_LATENCY", "0"),
+    error_rate=float(os.getenv("BENCH_DB_ERROR_RATE", "0")),
+)
+
+from wsgi import app  # noqa: E402
+
+
+if __name__ == "__main__":
+    from werkzeug.serving import run_simple
+
+    parser = argparse.ArgumentParser(description="Serve the backend for a benchmark run")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5001")))
+    args = parser.parse_args()
+    run_simple(args.host, args.port, app, threaded=True)
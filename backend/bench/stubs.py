@@ -0,0 +1,242 @@
+"""
+Local stand-ins for the OpenAI, Google Custom Search and ElevenLabs APIs.
+
+Each stub is a small threaded HTTP server that answers with responses
+shaped like the real API (enough for the backend's parsers), after a delay
+drawn from a latency model, and fails a configurable fraction of requests.
+"""
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FALLACY_LABELS = (
+    "ad hominem", "ad populum", "appeal to emotion", "circular reasoning", "false causality",
+    "false dilemma", "faulty generalization",
+)
+
+TRANSCRIPT = (
+    "Renewable energy is now cheaper than coal in most countries. "
+    "My opponent clearly doesn't understand economics, so we can ignore his numbers. "
+    "Everyone I know already drives an electric car, which proves the market has decided. "
+    "If we don't ban fossil fuels tomorrow, the planet is doomed. "
+    "Solar capacity doubled between 2018 and 2022. "
+    "Wind turbines are reliable because they rarely fail. "
+    "The Eiffel Tower is in Berlin. "
+    "Nuclear power produces less carbon per kilowatt hour than natural gas."
+)
+
+
+class LatencyModel:
+    """
+    Delay distribution in milliseconds, parsed from a spec string:
+      "0" or "fixed:MS", "uniform:LO:HI", "normal:MEAN:STD", "lognormal:MEDIAN:SIGMA"
+    """
+
+    def __init__(self, spec: str = "0"):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        try:
+            if not params:
+                kind, params = "fixed", [kind]
+            values = [float(p) for p in params]
+            if kind == "fixed" and len(values) == 1:
+                self._sample = lambda: values[0]
+            elif kind == "uniform" and len(values) == 2:
+                self._sample = lambda: random.uniform(values[0], values[1])
+            elif kind == "normal" and len(values) == 2:
+                self._sample = lambda: random.gauss(values[0], values[1])
+            elif kind == "lognormal" and len(values) == 2:
+                mu = math.log(max(values[0], 1e-3))
+                self._sample = lambda: random.lognormvariate(mu, values[1])
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Invalid latency spec '{spec}' "
+                             "(expected MS, fixed:MS, uniform:LO:HI, normal:MEAN:STD or lognormal:MEDIAN:SIGMA)")
+
+    def sample(self) -> float:
+        """Delay in seconds (never negative)."""
+        return max(0.0, self._sample()) / 1000.0
+
+    def __repr__(self):
+        return self.spec
+
+
+class StubUpstream:
+    """Behaviour shared by the stubs: delay, error injection and counters."""
+
+    name = "stub"
+    error_status = 500
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def respond(self, method: str, path: str, query: Dict[str, Any], body: bytes) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def handle(self, method: str, path: str, query: Dict[str, Any], body: bytes) -> Tuple[int, Any]:
+        time.sleep(self.latency.sample())
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+        if failed:
+            return self.error_status, {"error": {"message": f"{self.name} stub: injected failure",
+                                                 "type": "server_error"}}
+        return self.respond(method, path, query, body)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors,
+                    "latency": self.latency.spec, "error_rate": self.error_rate}
+
+
+class OpenAIStub(StubUpstream):
+    """
+    /v1/chat/completions for the prompts the backend sends: claim
+    extraction, fact-check verdicts, fallacy classification and summaries.
+    """
+
+    name = "openai"
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0, claims: int = 3,
+                 search_rate: float = 0.3, fallacy_rate: float = 0.2):
+        super().__init__(latency, error_rate)
+        self.claims = claims
+        self.search_rate = search_rate
+        self.fallacy_rate = fallacy_rate
+
+    def _content(self, system: str, user: str) -> str:
+        if "factual claim" in system:
+            match = re.search(r'"""(.*)"""', user, re.S)
+            text = match.group(1) if match else user
+            sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+            return json.dumps({"statements": sentences[:self.claims]})
+        if user.startswith("Statement:"):
+            if "must return a final verdict" not in user and random.random() < self.search_rate:
+                return json.dumps({"action": "search", "query": user.split("\n")[1][:80]})
+            return json.dumps({"action": "final", "result": random.choice(["true", "false"]),
+                               "explanation": "Stub verdict based on the supplied evidence."})
+        if "Sentences (numbered):" in user:
+            numbered = re.findall(r"^(\d+)\. ", user.split("Sentences (numbered):", 1)[1], re.M)
+            return json.dumps({"results": [
+                {"index": int(n),
+                 "label": random.choice(FALLACY_LABELS) if random.random() < self.fallacy_rate else "none",
+                 "confidence": round(random.uniform(0.6, 0.99), 2)}
+                for n in numbered
+            ]})
+        if "debate analyst" in system:
+            return ("**Thesis:** Renewable energy should replace fossil fuels.\n\n**Key Points:**\n"
+                    "- Cost has fallen below coal\n- Capacity is growing quickly\n- Nuclear is low-carbon")
+        return json.dumps({"ok": True})
+
+    def respond(self, method, path, query, body):
+        if method == "GET" and path.endswith("/models"):
+            return 200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model",
+                                                     "created": 0, "owned_by": "stub"}]}
+        if not path.endswith("/chat/completions"):
+            return 404, {"error": {"message": f"unknown path {path}"}}
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [])
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        content = self._content(system, user)
+        prompt_tokens = (len(system) + len(user)) // 4
+        completion_tokens = max(1, len(content) // 4)
+        return 200, {
+            "id": f"chatcmpl-stub-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+class GoogleSearchStub(StubUpstream):
+    """/customsearch/v1 with `num` results per query."""
+
+    name = "google"
+
+    def respond(self, method, path, query, body):
+        q = query.get("q", [""])[0]
+        num = int(query.get("num", ["5"])[0])
+        return 200, {"items": [
+            {"title": f"Result {i + 1} for {q[:40]}",
+             "snippet": f"Snippet {i + 1}: independent sources discuss the claim '{q[:60]}'.",
+             "link": f"https://example.org/{i + 1}"}
+            for i in range(num)
+        ]}
+
+
+class ElevenLabsStub(StubUpstream):
+    """/v1/speech-to-text returning a fixed debate transcript."""
+
+    name = "elevenlabs"
+
+    def respond(self, method, path, query, body):
+        if not body:
+            return 400, {"detail": "no audio"}
+        return 200, {"text": TRANSCRIPT, "language_code": "en"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        status, payload = self.server.upstream.handle(self.command, url.path, parse_qs(url.query), body)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_HEAD = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, upstream: StubUpstream, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.upstream = upstream
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        if host in ("0.0.0.0", ""):
+            # Bound to every interface; advertise a name other machines can reach
+            host = socket.getfqdn()
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name=f"stub-{self.upstream.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
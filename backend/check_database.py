@@ -9,7 +9,7 @@ try:
 except:
     pass
 
-from services.snowflake_service import get_snowflake_service
+from services.snowflake_service import get_debate_backend
 
 def check_database():
     """Check and display all saved debates."""
@@ -18,7 +18,7 @@ def check_database():
         print("Checking Snowflake Database for Saved Debates")
         print("="*60 + "\n")
         
-        db_service = get_snowflake_service()
+        db_service = get_debate_backend()
         
         # Initialize schema if needed
         print("📋 Initializing database schema (if needed)...")
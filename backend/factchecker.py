@@ -3,8 +3,15 @@ import os
 import dotenv
 import requests
 import json
+import threading
 import time
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.clients import get_http_session, get_openai_client, get_timeout
+from services.metrics import record_openai_usage, upstream
+from services.search_cache import get_search_cache
+from services.tracing import in_context, set_attribute, span, traced
+from services.verdict_cache import get_verdict_cache
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -12,11 +19,19 @@ dotenv.load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY")
 GOOGLE_CSE_ID = os.getenv("CUSTOM_SEARCH_ENGINE_ID")
 OPEN_AI_KEY = os.getenv("OPEN_AI_KEY")
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
+# Number of claims verified in parallel by check_text (1 = sequential)
+FACTCHECK_MAX_WORKERS = int(os.getenv("FACTCHECK_MAX_WORKERS", "4"))
+
+
+
+def keys_configured() -> bool:
+    return all([GOOGLE_API_KEY, GOOGLE_CSE_ID, OPEN_AI_KEY])
 
-if not all([GOOGLE_API_KEY, GOOGLE_CSE_ID, OPEN_AI_KEY]):
-    raise ValueError("Missing required API keys in .env file")
 
-client = OpenAI(api_key=OPEN_AI_KEY)
+def _client():
+    """Shared OpenAI client, built on first use (not at import)."""
+    return get_openai_client(OPEN_AI_KEY)
 
 
 class FactCheckerAgent:
@@ -25,15 +40,22 @@ class FactCheckerAgent:
       1) Extract factual statements from text
       2) Check each statement via Google + LLM
       3) Return structured JSON results
+
+    Statements are checked concurrently, with at most `max_workers`
+    claims in flight at once. Set max_workers=1 for the old sequential mode.
     """
 
-    def __init__(self, max_iterations=3, google_results=5):
+    def __init__(self, max_iterations=3, google_results=5, max_workers=None):
+        if not keys_configured():
+            raise ValueError("Missing required API keys in .env file")
         self.max_iterations = max_iterations
         self.google_results = google_results
+        self.max_workers = max(1, max_workers or FACTCHECK_MAX_WORKERS)
 
     # -------------------------
     # 1) Extract factual statements
     # -------------------------
+    @traced()
     def extract_factual_statements(self, text: str):
         system_prompt = (
             "You are an assistant that extracts checkable factual claims from a text. You are trying to determine the truth of these claims, so claims that the user would gain nothing from lying about can be skipped. A factual claim is a statement that makes an assertion about the world, society, or measurable reality, which could in principle be verified or refuted. Exclude opinions, commands, vague statements, greetings, self-identifying information (like names, birthdays, or locations), or statements about personal experience that are irrelevant to broader factual knowledge. Respond only in JSON format:"
@@ -46,16 +68,18 @@ class FactCheckerAgent:
         user_prompt = f"Input text:\n\"\"\"{text}\"\"\"\nExtract statements of fact."
 
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=800
-            )
+            with upstream("openai", "extract_claims"):
+                resp = _client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.0,
+                    max_tokens=800
+                )
+            record_openai_usage(resp, "extract_claims")
             raw_content = resp.choices[0].message.content
             if isinstance(raw_content, dict):
                 data = raw_content
@@ -76,16 +100,24 @@ class FactCheckerAgent:
     # 2) Google Search
     # -------------------------
     def google_search(self, query: str):
+        cache = get_search_cache()
+        if cache is not None:
+            cached = cache.get(query, self.google_results)
+            set_attribute("search_cache", "miss" if cached is None else "hit")
+            if cached is not None:
+                return {"query": query, "results": cached}
+
         try:
-            url = "https://www.googleapis.com/customsearch/v1"
+            url = GOOGLE_SEARCH_URL
             params = {
                 "key": GOOGLE_API_KEY,
                 "cx": GOOGLE_CSE_ID,
                 "q": query,
                 "num": self.google_results
             }
-            res = requests.get(url, params=params, timeout=10)
-            res.raise_for_status()
+            with upstream("google", "search"):
+                res = get_http_session("google").get(url, params=params, timeout=get_timeout("google"))
+                res.raise_for_status()
             data = res.json()
             snippets = []
             if "items" in data:
@@ -95,6 +127,8 @@ class FactCheckerAgent:
                         "snippet": item.get("snippet", ""),
                         "link": item.get("link", "")
                     })
+            if cache is not None:
+                cache.set(query, self.google_results, snippets)
             return {"query": query, "results": snippets}
         except requests.exceptions.RequestException as e:
             return {"query": query, "error": str(e), "results": []}
@@ -128,16 +162,18 @@ class FactCheckerAgent:
             user_prompt += "You must return a final verdict even if evidence is limited."
 
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.15,
-                max_tokens=800
-            )
+            with upstream("openai", "verdict"):
+                resp = _client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.15,
+                    max_tokens=800
+                )
+            record_openai_usage(resp, "verdict")
             raw = resp.choices[0].message.content
             if isinstance(raw, dict):
                 data = raw
@@ -156,17 +192,41 @@ class FactCheckerAgent:
     # -------------------------
     # 4) Single statement check
     # -------------------------
+    @traced()
     def check_single_statement(self, statement: str):
+        cache = get_verdict_cache()
+        if cache is not None:
+            cached = cache.lookup(statement)
+            if cached is not None:
+                set_attribute("verdict_cache", "hit")
+                print(f"Verdict cache hit ({cached['similarity']}): {statement}")
+                return {
+                    "statement": statement,
+                    "verdict": cached["verdict"],
+                    "explanation": cached["explanation"],
+                    "evidence": cached["evidence"]
+                }
+
+        result = self._investigate_statement(statement)
+        # 'unknown' is often a transient search/LLM failure, so don't reuse it
+        if cache is not None and result["verdict"] in ("true", "false"):
+            cache.store(result)
+        return result
+
+    def _investigate_statement(self, statement: str):
         all_evidence = []
         iteration = 0
 
-        initial = self.google_search(statement)
+        with span("google_search", iteration=0):
+            initial = self.google_search(statement)
         all_evidence.append(initial)
 
         while iteration < self.max_iterations:
-            llm_resp = self.call_llm_for_verdict(
-                statement, all_evidence, force_final=(iteration == self.max_iterations - 1)
-            )
+            with span("call_llm_for_verdict", iteration=iteration) as verdict_span:
+                llm_resp = self.call_llm_for_verdict(
+                    statement, all_evidence, force_final=(iteration == self.max_iterations - 1)
+                )
+                verdict_span.set("action", llm_resp.get("action"))
 
             if llm_resp.get("action") == "final":
                 result = llm_resp.get("result", "unknown").lower()
@@ -183,7 +243,8 @@ class FactCheckerAgent:
             # If action==search
             iteration += 1
             query = llm_resp.get("query") or statement
-            new_res = self.google_search(query)
+            with span("google_search", iteration=iteration):
+                new_res = self.google_search(query)
             all_evidence.append(new_res)
 
         # fallback
@@ -195,18 +256,68 @@ class FactCheckerAgent:
         }
 
     # -------------------------
-    # 5) Main entrypoint
+    # 5) Main entrypoints
     # -------------------------
     def check_text(self, text: str):
         statements = self.extract_factual_statements(text)
-        results = []
-        for s in statements:
-            print(f"Checking statement: {s}")
-            res = self.check_single_statement(s)
-            results.append(res)
-            time.sleep(0.3)
+        results = [None] * len(statements)
+        for event in self._iter_verdicts(statements):
+            results[event["index"]] = event["result"]
         return results
 
+    def iter_check_text(self, text: str):
+        """
+        Streaming variant of check_text. Yields
+          {"type": "claims", "statements": [...]} once, then
+          {"type": "verdict", "index": i, "result": {...}} per statement
+        as soon as each check finishes (not necessarily in order).
+        """
+        statements = self.extract_factual_statements(text)
+        yield {"type": "claims", "statements": statements}
+        yield from self._iter_verdicts(statements)
+
+    def _iter_verdicts(self, statements):
+        if self.max_workers == 1 or len(statements) <= 1:
+            for i, s in enumerate(statements):
+                print(f"Checking statement: {s}")
+                res = self.check_single_statement(s)
+                yield {"type": "verdict", "index": i, "result": res}
+                if i < len(statements) - 1:
+                    time.sleep(0.3)
+            return
+
+        workers = min(self.max_workers, len(statements))
+        print(f"Checking {len(statements)} statements ({workers} in parallel)")
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="factcheck")
+        try:
+            check = in_context(self.check_single_statement)
+            futures = {pool.submit(check, s): i for i, s in enumerate(statements)}
+            for future in as_completed(futures):
+                yield {"type": "verdict", "index": futures[future], "result": future.result()}
+        finally:
+            # Don't start queued checks if the consumer stopped listening
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent() -> FactCheckerAgent:
+    """Get or create the shared FactCheckerAgent (raises ValueError if keys are missing)."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = FactCheckerAgent()
+    return _agent
+
+
+def agent_initialized() -> bool:
+    """Whether get_agent() has built the shared agent in this process."""
+    return _agent is not None
+
 
 # -------------------------
 # Manual test
@@ -223,3 +334,4 @@ if __name__ == "__main__":
     out = agent.check_text(sample_text)
     print("\nRESULTS:")
     print(json.dumps(out, indent=2))
+
@@ -1,20 +1,28 @@
 import json
 import os
-from typing import Any, Dict, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+if TYPE_CHECKING:
+	from openai import OpenAI
 
+from services.audio import AudioSource
+from services.clients import get_openai_client
+from services.metrics import record_openai_usage, upstream
+from services.sentence_cache import get_sentence_cache
+from services.tracing import in_context, traced
 from services.transcription import transcribe_audio
 
 
-def _get_openai_client() -> OpenAI:
+def _get_openai_client() -> "OpenAI":
 	"""
-	Initialize and return an OpenAI client using OPENAI_API_KEY from env.
+	Return the shared OpenAI client for OPENAI_API_KEY from env.
 	"""
 	api_key = os.getenv("OPENAI_API_KEY")
 	if not api_key:
 		raise ValueError("OPENAI_API_KEY is not set")
-	return OpenAI(api_key=api_key)
+	return get_openai_client(api_key)
 
 
 def _get_model_id() -> str:
@@ -28,56 +36,88 @@ def _get_model_id() -> str:
 	return model_id
 
 
-def generate_json_from_text(text: str, system_preamble: Optional[str] = None) -> Dict[str, Any]:
+# System prompt matching your friend's model training
+_SYSTEM_MSG = (
+	"Classify each sentence into exactly one label from the allowed set. "
+	"Use the full paragraph context. Only label a fallacy if clear, else 'none'. "
+	"Respond ONLY in JSON: results=[{index,label,confidence}] (confidence 0..1)."
+)
+
+# Allowed labels from the fine-tuned model
+_ALLOWED_LABELS = (
+	"ad hominem, ad populum, appeal to emotion, circular reasoning, equivocation, "
+	"fallacy of credibility, fallacy of extension, fallacy of logic, fallacy of relevance, "
+	"false causality, false dilemma, faulty generalization, intentional, miscellaneous, none"
+)
+
+# Chunked mode: transcripts with more sentences than this are split into
+# overlapping windows that are classified concurrently
+FALLACY_CHUNK_SENTENCES = int(os.getenv("FALLACY_CHUNK_SENTENCES", "12"))
+FALLACY_CHUNK_OVERLAP = int(os.getenv("FALLACY_CHUNK_OVERLAP", "2"))
+FALLACY_MAX_PARALLEL = int(os.getenv("FALLACY_MAX_PARALLEL", "4"))
+
+
+def _split_sentences(text: str) -> List[str]:
 	"""
-	Send the provided text to the fine-tuned model and return parsed JSON.
-	Uses sentence-by-sentence classification as expected by the fine-tuned model.
+	Split text into sentence pieces (basic split by punctuation).
+	Each piece keeps its trailing punctuation so windows can be rejoined.
 	"""
-	if not text or not text.strip():
-		raise ValueError("Empty text")
+	return [p for p in re.findall(r"[^.!?]+[.!?]*", text) if p.strip(" \t\n.!?")]
+
+
+def _sentence_text(piece: str) -> str:
+	return piece.strip().rstrip(".!?").strip()
+
+
+def _chunk_windows(count: int, size: int, overlap: int) -> List[Tuple[int, int]]:
+	"""[start, end) windows of at most `size` sentences, overlapping by `overlap`."""
+	size = max(1, size)
+	step = max(1, size - max(0, overlap))
+	windows = []
+	start = 0
+	while True:
+		end = min(count, start + size)
+		windows.append((start, end))
+		if end >= count:
+			return windows
+		start += step
 
-	client = _get_openai_client()
-	model_id = _get_model_id()
 
-	# Split text into sentences (basic split by punctuation)
-	import re
-	sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-	
+def _classify_window(client: "OpenAI", model_id: str, pieces: List[str], start: int, end: int,
+					 indices: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+	"""
+	Classify sentences in one model call, using sentences [start, end) as the
+	paragraph context. Only `indices` (default: all of [start, end)) are
+	numbered for classification. Returns {global sentence index: {label, confidence}}.
+	"""
+	if indices is None:
+		indices = list(range(start, end))
+	paragraph = "".join(pieces[start:end]).strip()
 	# Number the sentences
-	numbered_sentences = "\n".join([f"{i+1}. {s}" for i, s in enumerate(sentences)])
-	
-	# System prompt matching your friend's model training
-	system_msg = (
-		"Classify each sentence into exactly one label from the allowed set. "
-		"Use the full paragraph context. Only label a fallacy if clear, else 'none'. "
-		"Respond ONLY in JSON: results=[{index,label,confidence}] (confidence 0..1)."
+	numbered_sentences = "\n".join(
+		[f"{i + 1}. {_sentence_text(pieces[idx])}" for i, idx in enumerate(indices)]
 	)
-	
-	# Allowed labels from the fine-tuned model
-	allowed_labels = (
-		"ad hominem, ad populum, appeal to emotion, circular reasoning, equivocation, "
-		"fallacy of credibility, fallacy of extension, fallacy of logic, fallacy of relevance, "
-		"false causality, false dilemma, faulty generalization, intentional, miscellaneous, none"
-	)
-	
+
 	# User prompt format matching training data
 	user_msg = (
-		f"Allowed labels: {allowed_labels}.\n"
-		f"Paragraph: {text}\n"
+		f"Allowed labels: {_ALLOWED_LABELS}.\n"
+		f"Paragraph: {paragraph}\n"
 		f"Sentences (numbered):\n{numbered_sentences}\n\n"
 		f"Return JSON with array 'results', each item: {{index, label, confidence}}."
 	)
 
 	# Call the fine-tuned model
-	response = client.chat.completions.create(
-		model=model_id,
-		temperature=0,
-		response_format={"type": "json_object"},
-		messages=[
-			{"role": "system", "content": system_msg},
-			{"role": "user", "content": user_msg},
-		],
-	)
+	with upstream("openai", "fallacies"):
+		response = client.chat.completions.create(
+			model=model_id,
+			temperature=0,
+			response_format={"type": "json_object"},
+			messages=[
+				{"role": "system", "content": _SYSTEM_MSG},
+				{"role": "user", "content": user_msg},
+			],
+		)
+	record_openai_usage(response, "fallacies")
 
 	content = response.choices[0].message.content if response.choices else ""
 	if not content:
@@ -85,39 +125,160 @@ def generate_json_from_text(text: str, system_preamble: Optional[str] = None) ->
 
 	try:
 		result = json.loads(content)
-		
-		# Transform model output to our expected format
-		# Model returns: {"results": [{"index": 1, "label": "ad hominem", "confidence": 0.95}, ...]}
-		# We need: {"fallacies": [{"type": "Ad Hominem", "quote": "...", "explanation": "..."}, ...]}
-		
-		fallacies = []
-		if "results" in result:
-			for item in result["results"]:
-				label = item.get("label", "none").strip().lower()
-				if label != "none":
-					sentence_idx = item.get("index", 1) - 1  # Convert to 0-based
-					quote = sentences[sentence_idx] if 0 <= sentence_idx < len(sentences) else text
-					
-					# Convert label to title case
-					fallacy_type = label.replace("_", " ").title()
-					
-					fallacies.append({
-						"type": fallacy_type,
-						"quote": quote,
-						"explanation": f"This statement contains {fallacy_type.lower()}, which undermines logical reasoning.",
-						"confidence": item.get("confidence", 0)
-					})
-		
-		return {"fallacies": fallacies}
-		
 	except json.JSONDecodeError as e:
 		raise RuntimeError("Model response was not valid JSON") from e
 
+	# Model returns: {"results": [{"index": 1, "label": "ad hominem", "confidence": 0.95}, ...]}
+	labels = {}
+	for item in result.get("results", []):
+		try:
+			local_idx = int(item.get("index", 1)) - 1  # Convert to 0-based
+		except (TypeError, ValueError):
+			continue
+		if not 0 <= local_idx < len(indices):
+			continue
+		labels[indices[local_idx]] = {
+			"label": str(item.get("label", "none")).strip().lower(),
+			"confidence": item.get("confidence", 0),
+		}
+	return labels
+
 
-def analyze_audio_to_json(audio_bytes: bytes, mime_type: Optional[str] = None) -> Dict[str, Any]:
+def _classify_chunked(client: "OpenAI", model_id: str, pieces: List[str]) -> Dict[int, Dict[str, Any]]:
+	"""
+	Classify overlapping windows concurrently and merge them. A sentence that
+	falls in two windows keeps the label from the window where it had the most
+	surrounding context (ties go to the higher confidence).
+	"""
+	windows = _chunk_windows(len(pieces), FALLACY_CHUNK_SENTENCES, FALLACY_CHUNK_OVERLAP)
+	workers = max(1, min(FALLACY_MAX_PARALLEL, len(windows)))
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fallacy") as pool:
+		window_labels = list(pool.map(
+			in_context(lambda w: _classify_window(client, model_id, pieces, w[0], w[1])), windows
+		))
+
+	merged: Dict[int, Dict[str, Any]] = {}
+	rank: Dict[int, Tuple[int, float]] = {}
+	for (start, end), labels in zip(windows, window_labels):
+		for idx, entry in labels.items():
+			if not start <= idx < end:
+				continue
+			context = min(idx - start, end - 1 - idx)
+			try:
+				confidence = float(entry.get("confidence") or 0)
+			except (TypeError, ValueError):
+				confidence = 0.0
+			if idx not in rank or (context, confidence) > rank[idx]:
+				rank[idx] = (context, confidence)
+				merged[idx] = entry
+	return merged
+
+
+def _classify_missing(client: "OpenAI", model_id: str, pieces: List[str], missing: List[int],
+					  context: int) -> Dict[int, Dict[str, Any]]:
+	"""
+	Classify only the `missing` sentences, in groups of at most
+	FALLACY_CHUNK_SENTENCES. Each group's paragraph is its sentences plus
+	`context` neighbours on either side. A new group starts wherever the gap
+	to the next missing sentence is wider than both contexts, so a window
+	never spans long stretches of sentences that are already labelled.
+	"""
+	size = max(1, FALLACY_CHUNK_SENTENCES)
+	groups: List[List[int]] = []
+	for idx in sorted(missing):
+		if groups and len(groups[-1]) < size and idx - groups[-1][-1] <= 2 * context + 1:
+			groups[-1].append(idx)
+		else:
+			groups.append([idx])
+
+	def classify(group):
+		start = max(0, group[0] - context)
+		end = min(len(pieces), group[-1] + context + 1)
+		return _classify_window(client, model_id, pieces, start, end, indices=group)
+
+	workers = max(1, min(FALLACY_MAX_PARALLEL, len(groups)))
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fallacy") as pool:
+		merged: Dict[int, Dict[str, Any]] = {}
+		for labels in pool.map(in_context(classify), groups):
+			merged.update(labels)
+	return merged
+
+
+@traced()
+def generate_json_from_text(text: str, system_preamble: Optional[str] = None, chunked: Optional[bool] = None) -> Dict[str, Any]:
+	"""
+	Send the provided text to the fine-tuned model and return parsed JSON.
+	Uses sentence-by-sentence classification as expected by the fine-tuned model.
+
+	Long transcripts (more than FALLACY_CHUNK_SENTENCES sentences, or when
+	chunked=True) are classified as overlapping windows in parallel; the
+	returned {"fallacies": [...]} shape is the same either way.
+
+	Labels are cached per sentence and context window, so when a transcript
+	overlaps one seen before only the new or changed sentences are sent.
+	"""
+	if not text or not text.strip():
+		raise ValueError("Empty text")
+
+	client = _get_openai_client()
+	model_id = _get_model_id()
+
+	pieces = _split_sentences(text)
+	sentences = [_sentence_text(p) for p in pieces]
+	if chunked is None:
+		chunked = len(pieces) > FALLACY_CHUNK_SENTENCES
+
+	# Reuse labels for sentences already classified in the same context
+	cache = get_sentence_cache()
+	keys = cache.keys_for(model_id, sentences) if cache is not None else []
+	labels = cache.get_many(keys) if cache is not None else {}
+	missing = [i for i in range(len(pieces)) if i not in labels]
+
+	if len(missing) == len(pieces):
+		if chunked and len(pieces) > 1:
+			new_labels = _classify_chunked(client, model_id, pieces)
+		else:
+			new_labels = _classify_window(client, model_id, pieces, 0, len(pieces))
+	elif missing:
+		print(f"Fallacy cache: {len(pieces) - len(missing)}/{len(pieces)} sentences cached")
+		new_labels = _classify_missing(client, model_id, pieces, missing, cache.context)
+	else:
+		new_labels = {}
+
+	if cache is not None and new_labels:
+		cache.set_many({keys[i]: entry for i, entry in new_labels.items() if 0 <= i < len(keys)})
+	labels.update(new_labels)
+
+	# Transform model output to our expected format
+	# We need: {"fallacies": [{"type": "Ad Hominem", "quote": "...", "explanation": "..."}, ...]}
+	fallacies = []
+	for sentence_idx in sorted(labels):
+		item = labels[sentence_idx]
+		label = item["label"]
+		if label != "none":
+			quote = sentences[sentence_idx] if 0 <= sentence_idx < len(sentences) else text
+
+			# Convert label to title case
+			fallacy_type = label.replace("_", " ").title()
+
+			fallacies.append({
+				"type": fallacy_type,
+				"quote": quote,
+				"explanation": f"This statement contains {fallacy_type.lower()}, which undermines logical reasoning.",
+				"confidence": item.get("confidence", 0)
+			})
+
+	return {"fallacies": fallacies}
+
+
+def analyze_audio_to_json(audio_bytes: AudioSource, mime_type: Optional[str] = None) -> Dict[str, Any]:
 	"""
 	Transcribe audio with ElevenLabs, then send transcript to the fine-tuned model.
-	Return the model's JSON.
+	Return the model's JSON. Audio may be bytes or a seekable file (e.g. a
+	spooled upload), which is streamed rather than read into memory.
+
+	Retried uploads of the same clip reuse the cached transcript (and cached
+	sentence labels), so only the first upload pays for STT.
 	"""
 	transcript = transcribe_audio(audio_bytes=audio_bytes, mime_type=mime_type)
 	return generate_json_from_text(transcript)
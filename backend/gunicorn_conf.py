@@ -0,0 +1,67 @@
+"""
+Gunicorn settings for serving the backend in production:
+
+    cd backend && gunicorn -c gunicorn_conf.py wsgi:app
+
+Requests spend nearly all of their time waiting on OpenAI, Google and
+ElevenLabs, so the default worker class is gevent: each worker process
+serves up to WEB_WORKER_CONNECTIONS requests concurrently as greenlets,
+and throughput scales with waiting requests instead of OS threads.
+Set WEB_WORKER_CLASS=gthread (with WEB_THREADS) if gevent isn't available.
+
+State every worker must see (async jobs, the save journal, metrics) is kept in
+SQLite files under LIBRA_CACHE_DIR, on a disk all workers share.
+In-memory caches and in-flight request coalescing are per worker; set
+TRANSCRIPT_CACHE_PERSIST=1 and FALLACY_CACHE_PERSIST=1 to share cached
+transcripts and fallacy labels as well.
+
+Configuration (environment):
+  PORT                      listen port (default 5001)
+  WEB_CONCURRENCY           worker processes (default: CPU count)
+  WEB_WORKER_CLASS          gevent (default), gthread or sync
+  WEB_WORKER_CONNECTIONS    concurrent requests per gevent worker (default 1000)
+  WEB_THREADS               threads per gthread worker (default 32)
+  WEB_REQUEST_TIMEOUT       seconds before a request is aborted with 504 (gevent only, default 120)
+  WEB_TIMEOUT               seconds a silent worker may hang before it is restarted (default 180)
+  WEB_GRACEFUL_TIMEOUT      seconds in-flight requests get to finish on shutdown (default 60)
+  WEB_KEEPALIVE             seconds to hold idle keep-alive connections (default 5)
+  WEB_MAX_REQUESTS          recycle a worker after this many requests, 0 = never (default 0)
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = os.getenv("WEB_WORKER_CLASS", "gevent")
+worker_connections = int(os.getenv("WEB_WORKER_CONNECTIONS", "1000"))
+threads = int(os.getenv("WEB_THREADS", "32"))
+
+timeout = int(os.getenv("WEB_TIMEOUT", "180"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "60"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# The app is imported in each worker after gevent has patched the stdlib,
+# so its clients, pools and background threads are green and per-process
+preload_app = False
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def worker_exit(server, worker):
+    """Flush write-behind debate saves before the worker goes away (graceful drain)."""
+    try:
+        from services.save_queue import get_save_queue, write_behind_enabled
+        if write_behind_enabled():
+            saved = get_save_queue().drain(timeout=min(graceful_timeout, 30))
+            server.log.info("Worker %s drained %s queued debate save(s)", worker.pid, saved)
+    except Exception as e:
+        server.log.warning("Save queue drain failed: %s", e)
+    try:
+        # Record the last few seconds of this worker's metrics before they are retired
+        from services import metrics
+        metrics.sync()
+    except Exception as e:
+        server.log.warning("Metrics sync failed: %s", e)
@@ -0,0 +1,514 @@
+"""
+Audio normalization before speech-to-text.
+
+Phones upload stereo, 44.1/48 kHz audio with silence at both ends; none of
+that helps transcription but all of it is uploaded to the STT API. This
+stage down-mixes to mono, resamples to a speech rate, trims leading and
+trailing silence and (with ffmpeg) re-encodes to a compact codec.
+
+- ffmpeg on PATH (or AUDIO_FFMPEG_PATH): handles any container the client
+  sends. ffprobe (or AUDIO_FFPROBE_PATH) is used to read durations.
+- Otherwise PCM WAV is processed in pure Python (wave + audioop); other
+  formats are passed through unchanged.
+
+The normalized audio is only used when it is smaller than the original,
+and any failure falls back to the original audio.
+
+Audio can be passed as bytes or as a seekable binary file (e.g. a spooled
+upload). Files are processed in blocks through temporary files, so memory
+use doesn't grow with the length of the recording.
+
+Configuration (environment):
+  AUDIO_NORMALIZE           1 = enabled (default), 0 = send uploads as-is
+  AUDIO_SAMPLE_RATE         target sample rate in Hz (default 16000)
+  AUDIO_CODEC               ffmpeg output: opus (default), flac or wav
+  AUDIO_OPUS_BITRATE        opus bitrate (default 32k)
+  AUDIO_SILENCE_DB          level (dBFS) below which audio counts as silence (default -45)
+  AUDIO_TRIM_PADDING_MS     silence kept around speech when trimming (default 250)
+"""
+import array
+import hashlib
+import io
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:
+    import audioop  # removed from the stdlib in Python 3.13
+except ImportError:
+    audioop = None
+
+# Raw bytes or a seekable binary file
+AudioSource = Union[bytes, BinaryIO]
+
+# ffmpeg output settings per AUDIO_CODEC: (args, container, mime type)
+_FFMPEG_CODECS = {
+    "opus": (["-c:a", "libopus", "-application", "voip"], "ogg", "audio/ogg"),
+    "flac": (["-c:a", "flac"], "flac", "audio/flac"),
+    "wav": (["-c:a", "pcm_s16le"], "wav", "audio/wav"),
+}
+
+_WAV_MIME_TYPES = {"audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave"}
+
+# Block size for copying/hashing files
+_BLOCK = 1024 * 1024
+
+# Level windows are 20 ms (50 per second)
+_WINDOWS_PER_SECOND = 50
+
+
+def normalization_enabled() -> bool:
+    return os.getenv("AUDIO_NORMALIZE", "1") == "1"
+
+
+def _sample_rate() -> int:
+    return int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+
+
+def _silence_db() -> float:
+    return float(os.getenv("AUDIO_SILENCE_DB", "-45"))
+
+
+def _padding_ms() -> int:
+    return int(os.getenv("AUDIO_TRIM_PADDING_MS", "250"))
+
+
+def _ffmpeg_path() -> Optional[str]:
+    return os.getenv("AUDIO_FFMPEG_PATH") or shutil.which("ffmpeg")
+
+
+def _ffprobe_path() -> Optional[str]:
+    return os.getenv("AUDIO_FFPROBE_PATH") or shutil.which("ffprobe")
+
+
+def _ffmpeg_timeout() -> float:
+    return float(os.getenv("AUDIO_FFMPEG_TIMEOUT", "30"))
+
+
+def _codec_args() -> Tuple[List[str], str, str]:
+    codec = os.getenv("AUDIO_CODEC", "opus").lower()
+    codec_args, container, out_mime = _FFMPEG_CODECS.get(codec, _FFMPEG_CODECS["opus"])
+    if codec == "opus":
+        codec_args = codec_args + ["-b:a", os.getenv("AUDIO_OPUS_BITRATE", "32k")]
+    return codec_args, container, out_mime
+
+
+def settings_key() -> str:
+    """The settings that shape normalized audio, for keying caches of results derived from it."""
+    if not normalization_enabled():
+        return "raw"
+    codec = os.getenv("AUDIO_CODEC", "opus").lower()
+    bitrate = os.getenv("AUDIO_OPUS_BITRATE", "32k") if codec == "opus" else ""
+    return f"{codec}{bitrate}/{_sample_rate()}/{_silence_db()}/{_padding_ms()}"
+
+
+def spooled_file() -> tempfile.SpooledTemporaryFile:
+    """Temporary file kept in memory up to UPLOAD_SPOOL_BYTES, then on disk."""
+    return tempfile.SpooledTemporaryFile(max_size=int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024))))
+
+
+# -------------------- Audio sources --------------------
+def source_size(source: AudioSource) -> int:
+    """Size in bytes of bytes or a seekable file (position is preserved)."""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    pos = source.tell()
+    size = source.seek(0, io.SEEK_END)
+    source.seek(pos)
+    return size
+
+
+def read_head(source: AudioSource, n: int) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:n])
+    source.seek(0)
+    head = source.read(n)
+    source.seek(0)
+    return head
+
+
+def iter_blocks(source: AudioSource, block_size: int = _BLOCK):
+    """Yield the audio in blocks, from the start."""
+    if isinstance(source, (bytes, bytearray)):
+        for i in range(0, len(source), block_size):
+            yield bytes(source[i:i + block_size])
+        return
+    source.seek(0)
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        yield block
+    source.seek(0)
+
+
+def hash_source(source: AudioSource) -> str:
+    """SHA-256 hex digest of the audio, computed block by block."""
+    digest = hashlib.sha256()
+    for block in iter_blocks(source):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _as_path(source: AudioSource):
+    """A filesystem path holding the audio (ffmpeg needs one to seek in MP4/M4A)."""
+    with tempfile.NamedTemporaryFile(suffix=".audio") as tmp:
+        for block in iter_blocks(source):
+            tmp.write(block)
+        tmp.flush()
+        yield tmp.name
+
+
+def _is_wav(source: AudioSource, mime_type: Optional[str]) -> bool:
+    head = read_head(source, 12)
+    return (head[:4] == b"RIFF" and head[8:12] == b"WAVE") or (mime_type or "") in _WAV_MIME_TYPES
+
+
+# -------------------- PCM decoding --------------------
+def _run_ffmpeg(args: List[str], stdout: BinaryIO) -> None:
+    result = subprocess.run(args, stdout=stdout, stderr=subprocess.PIPE, timeout=_ffmpeg_timeout())
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()[:500]}")
+
+
+def _wav_to_pcm(source: AudioSource) -> Tuple[BinaryIO, int]:
+    """Decode WAV into a temp file of mono 16-bit PCM at no more than AUDIO_SAMPLE_RATE, a second at a time."""
+    src_file = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    src_file.seek(0)
+    pcm = tempfile.TemporaryFile()
+    try:
+        with wave.open(src_file, "rb") as src:
+            channels, width, rate = src.getnchannels(), src.getsampwidth(), src.getframerate()
+            if channels > 2:
+                raise ValueError(f"Unsupported channel count: {channels}")
+            target_rate = min(rate, _sample_rate())
+            state = None
+            while True:
+                frames = src.readframes(rate)
+                if not frames:
+                    break
+                if channels == 2:
+                    frames = audioop.tomono(frames, width, 0.5, 0.5)
+                if width != 2:
+                    if width == 1:
+                        frames = audioop.bias(frames, 1, -128)  # 8-bit WAV is unsigned
+                    frames = audioop.lin2lin(frames, width, 2)
+                if rate != target_rate:
+                    frames, state = audioop.ratecv(frames, 2, 1, rate, target_rate, state)
+                pcm.write(frames)
+    except Exception:
+        pcm.close()
+        raise
+    finally:
+        src_file.seek(0)
+    pcm.seek(0)
+    return pcm, target_rate
+
+
+def _decode_pcm(source: AudioSource, mime_type: Optional[str]) -> Optional[Tuple[BinaryIO, int]]:
+    """
+    Decode to mono 16-bit PCM in a temporary file: ffmpeg for any input,
+    or the WAV decoder without it. Returns (pcm_file, rate), or None when
+    the audio can't be decoded here.
+    """
+    ffmpeg = _ffmpeg_path()
+    if ffmpeg:
+        rate = _sample_rate()
+        pcm = tempfile.TemporaryFile()
+        try:
+            with _as_path(source) as path:
+                _run_ffmpeg([ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", path,
+                             "-vn", "-ac", "1", "-ar", str(rate), "-f", "s16le", "pipe:1"], pcm)
+        except Exception:
+            pcm.close()
+            raise
+        pcm.seek(0)
+        return pcm, rate
+    if audioop is not None and _is_wav(source, mime_type):
+        return _wav_to_pcm(source)
+    return None
+
+
+def _duration_seconds(source: AudioSource, mime_type: Optional[str]) -> Optional[float]:
+    """
+    Length of the audio without decoding it: from the WAV header, or from
+    the container via ffprobe. None when it can't be read cheaply.
+    """
+    if _is_wav(source, mime_type):
+        src_file = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        try:
+            src_file.seek(0)
+            with wave.open(src_file, "rb") as src:
+                return src.getnframes() / float(src.getframerate())
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass
+        finally:
+            src_file.seek(0)
+    ffprobe = _ffprobe_path()
+    if not ffprobe:
+        return None
+    try:
+        with _as_path(source) as path:
+            result = subprocess.run(
+                [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+                capture_output=True, timeout=_ffmpeg_timeout(),
+            )
+        return float(result.stdout.strip()) if result.returncode == 0 else None
+    except (ValueError, OSError, subprocess.SubprocessError):
+        return None
+
+
+def _rms(frames: bytes) -> float:
+    """RMS level of 16-bit PCM."""
+    if audioop is not None:
+        return audioop.rms(frames, 2)
+    samples = array.array("h", frames[:len(frames) - len(frames) % 2])
+    return math.sqrt(sum(x * x for x in samples) / len(samples)) if samples else 0.0
+
+
+def _window_bytes(rate: int) -> int:
+    return max(1, rate // _WINDOWS_PER_SECOND) * 2
+
+
+def _levels(pcm: BinaryIO, rate: int) -> List[float]:
+    """RMS level of every 20 ms window of a PCM file."""
+    window = _window_bytes(rate)
+    levels: List[float] = []
+    pcm.seek(0)
+    while True:
+        block = pcm.read(window * 500)
+        if not block:
+            break
+        levels.extend(_rms(block[i:i + window]) for i in range(0, len(block), window))
+    pcm.seek(0)
+    return levels
+
+
+def _silence_level() -> float:
+    return (2 ** 15) * (10 ** (_silence_db() / 20))
+
+
+def _copy_range(pcm: BinaryIO, start: int, end: int, write) -> None:
+    pcm.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = pcm.read(min(_BLOCK, remaining))
+        if not block:
+            break
+        write(block)
+        remaining -= len(block)
+
+
+def _pcm_to_wav(pcm: BinaryIO, rate: int, start: int, end: int) -> BinaryIO:
+    out = spooled_file()
+    with wave.open(out, "wb") as dst:
+        dst.setnchannels(1)
+        dst.setsampwidth(2)
+        dst.setframerate(rate)
+        _copy_range(pcm, start, end, dst.writeframes)
+    out.seek(0)
+    return out
+
+
+# -------------------- Normalization --------------------
+def _normalize_ffmpeg(ffmpeg: str, source: AudioSource) -> Tuple[BinaryIO, str]:
+    codec_args, container, out_mime = _codec_args()
+
+    # Trim both ends: silenceremove only trims the start, so run it on the reversed signal too
+    trim = (f"silenceremove=start_periods=1:start_threshold={_silence_db()}dB"
+            f":start_silence={_padding_ms() / 1000:.3f}")
+    filters = f"{trim},areverse,{trim},areverse"
+
+    out = tempfile.TemporaryFile()
+    try:
+        with _as_path(source) as path:
+            _run_ffmpeg([ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", path,
+                         "-vn", "-ac", "1", "-ar", str(_sample_rate()), "-af", filters,
+                         *codec_args, "-f", container, "pipe:1"], out)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    return out, out_mime
+
+
+def _trim_range(levels: List[float], rate: int) -> Tuple[int, int]:
+    """PCM byte range left after dropping leading/trailing windows quieter than AUDIO_SILENCE_DB."""
+    window = _window_bytes(rate)
+    silence = _silence_level()
+    loud = [i for i, level in enumerate(levels) if level > silence]
+    if not loud:
+        return 0, len(levels) * window
+    padding = int(rate * _padding_ms() / 1000) * 2
+    return max(0, loud[0] * window - padding), (loud[-1] + 1) * window + padding
+
+
+def _normalize_wav(source: AudioSource) -> Tuple[BinaryIO, str]:
+    pcm, rate = _wav_to_pcm(source)
+    with pcm:
+        size = pcm.seek(0, io.SEEK_END)
+        start, end = _trim_range(_levels(pcm, rate), rate)
+        return _pcm_to_wav(pcm, rate, start, min(end, size)), "audio/wav"
+
+
+def normalize_audio(source: AudioSource, mime_type: Optional[str] = None) -> Tuple[AudioSource, str, Dict[str, Any]]:
+    """
+    Normalize audio for STT. Returns (audio, mime_type, info), where info
+    reports bytes_in, bytes_out, method and normalize_ms. The original
+    audio is returned whenever normalization doesn't make it smaller;
+    normalized audio comes back as a temporary file.
+    """
+    mime_type = mime_type or "application/octet-stream"
+    size_in = source_size(source)
+    info: Dict[str, Any] = {"bytes_in": size_in, "bytes_out": size_in, "method": "none"}
+    if not size_in or not normalization_enabled():
+        return source, mime_type, info
+
+    start = time.perf_counter()
+    method = None
+    try:
+        ffmpeg = _ffmpeg_path()
+        if ffmpeg:
+            method = "ffmpeg"
+            out, out_mime = _normalize_ffmpeg(ffmpeg, source)
+        elif audioop is not None and _is_wav(source, mime_type):
+            method = "wav"
+            out, out_mime = _normalize_wav(source)
+        else:
+            return source, mime_type, info
+    except Exception as e:
+        print(f"⚠️  Audio normalization ({method}) failed, sending original: {e}")
+        info["error"] = str(e)
+        return source, mime_type, info
+    finally:
+        info["normalize_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    size_out = source_size(out)
+    if not size_out or size_out >= size_in:
+        out.close()
+        info["method"] = f"{method} (original kept)"
+        return source, mime_type, info
+
+    info.update(bytes_out=size_out, method=method)
+    saved = 1 - size_out / size_in
+    print(f"🎚️  Audio normalized ({method}): {size_in} → {size_out} bytes "
+          f"(-{math.floor(saved * 100)}%) in {info['normalize_ms']} ms")
+    return out, out_mime, info
+
+
+# -------------------- Segmentation --------------------
+def _encode_pcm(pcm: BinaryIO, rate: int, start: int, end: int) -> Tuple[bytes, str]:
+    """Encode one PCM byte range: AUDIO_CODEC via ffmpeg if available, else WAV."""
+    ffmpeg = _ffmpeg_path()
+    if ffmpeg:
+        codec_args, container, out_mime = _codec_args()
+        frames: List[bytes] = []
+        _copy_range(pcm, start, end, frames.append)
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "s16le", "-ar", str(rate), "-ac", "1",
+             "-i", "pipe:0", *codec_args, "-f", container, "pipe:1"],
+            input=b"".join(frames),
+            capture_output=True,
+            timeout=_ffmpeg_timeout(),
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout, out_mime
+    with _pcm_to_wav(pcm, rate, start, end) as wav_file:
+        return wav_file.read(), "audio/wav"
+
+
+def split_at_silence(source: AudioSource, mime_type: Optional[str] = None, max_seconds: float = 45.0,
+                     overlap_seconds: float = 1.0) -> Optional[List[Dict[str, Any]]]:
+    """
+    Split audio into segments of at most max_seconds, cutting at the quietest
+    20 ms window in the second half of each span. When no silent window is
+    found there, the segment runs on for overlap_seconds past the cut so a
+    word split by it is heard whole by one side (see stitch_transcripts).
+
+    Returns [{"audio", "mime_type", "start", "end", "overlapped"}, ...] in
+    order (times in seconds), or None when the audio can't be decoded here.
+    Audio whose header or container says it fits in one segment comes back
+    as-is without being decoded. Otherwise decoded audio stays in a
+    temporary file; each segment is encoded from it.
+    """
+    duration = _duration_seconds(source, mime_type)
+    if duration is not None and duration <= max_seconds:
+        return [{"audio": source, "mime_type": mime_type, "start": 0.0, "end": duration, "overlapped": False}]
+
+    decoded = _decode_pcm(source, mime_type)
+    if decoded is None:
+        return None
+    pcm, rate = decoded
+    with pcm:
+        window = _window_bytes(rate)
+        levels = _levels(pcm, rate)
+        total_windows = len(levels)
+        max_windows = max(2, int(max_seconds * _WINDOWS_PER_SECOND))
+        if total_windows <= max_windows:
+            return [{"audio": source, "mime_type": mime_type, "start": 0.0,
+                     "end": total_windows / _WINDOWS_PER_SECOND, "overlapped": False}]
+
+        silence = _silence_level()
+        overlap_windows = int(overlap_seconds * _WINDOWS_PER_SECOND)
+
+        spans = []
+        start = 0
+        while start < total_windows:
+            if total_windows - start <= max_windows:
+                spans.append((start, total_windows, total_windows))
+                break
+            lo, hi = start + max_windows // 2, start + max_windows - overlap_windows
+            cut = min(range(lo, max(hi, lo + 1)), key=lambda i: levels[i])
+            end = cut + 1 if levels[cut] <= silence else min(total_windows, cut + 1 + overlap_windows)
+            spans.append((start, cut + 1, end))
+            start = cut + 1
+
+        segments = []
+        for seg_start, cut_end, seg_end in spans:
+            chunk, chunk_mime = _encode_pcm(pcm, rate, seg_start * window, seg_end * window)
+            segments.append({"audio": chunk, "mime_type": chunk_mime,
+                             "start": seg_start / _WINDOWS_PER_SECOND, "end": seg_end / _WINDOWS_PER_SECOND,
+                             "overlapped": seg_end > cut_end})
+        return segments
+
+
+def _word_key(word: str) -> str:
+    return "".join(ch for ch in word.lower() if ch.isalnum())
+
+
+def stitch_transcripts(texts: List[str], overlapped: Optional[List[bool]] = None,
+                       max_overlap_words: int = 8) -> str:
+    """
+    Join segment transcripts in order. Where segment i was extended past
+    its cut (overlapped[i]), the same audio was transcribed twice, so the
+    longest run of up to max_overlap_words that ends it and starts the next
+    segment is kept only once, and a clipped last word that the next
+    segment heard in full ("jum" / "jumps") is dropped. Boundaries cut at
+    silence are joined as-is: a repeat there was really spoken twice.
+    """
+    words: List[str] = []
+    for i, text in enumerate(texts):
+        new_words = text.split()
+        if not new_words:
+            continue
+        if not (overlapped and i > 0 and overlapped[i - 1] and words):
+            words.extend(new_words)
+            continue
+        tail = [_word_key(w) for w in words[-max_overlap_words:]]
+        head = [_word_key(w) for w in new_words[:max_overlap_words]]
+        skip = 0
+        for n in range(min(len(tail), len(head)), 0, -1):
+            if tail[-n:] == head[:n] and any(tail[-n:]):
+                skip = n
+                break
+        if not skip and tail[-1] and tail[-1] != head[0] and head[0].startswith(tail[-1]):
+            words.pop()
+        words.extend(new_words[skip:])
+    return " ".join(words)
@@ -0,0 +1,141 @@
+"""
+Shared, pooled clients for upstream APIs (OpenAI, ElevenLabs, Google).
+
+Building a client per request means a new TLS handshake per call. This
+module keeps one keep-alive HTTP session per upstream and one OpenAI client
+per API key, sized to the server's concurrency. The registry is
+thread-safe and fork-aware: a forked worker process drops the clients it
+inherited and builds its own on first use.
+
+Configuration (environment):
+  UPSTREAM_POOL_SIZE        keep-alive connections per upstream (default 32)
+  UPSTREAM_CONNECT_TIMEOUT  seconds to establish a connection (default 5)
+  UPSTREAM_MAX_RETRIES      retries on connection errors / 429 / 5xx (default 2)
+  UPSTREAM_RETRY_BACKOFF    exponential backoff factor in seconds (default 0.5)
+  <NAME>_TIMEOUT            read timeout per upstream, e.g. GOOGLE_TIMEOUT,
+                            ELEVENLABS_TIMEOUT, OPENAI_TIMEOUT
+"""
+import os
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_DEFAULT_READ_TIMEOUTS = {
+    "google": 10.0,
+    "elevenlabs": 60.0,
+    "openai": 60.0,
+}
+
+_lock = threading.RLock()
+_pid = os.getpid()
+_sessions: Dict[str, requests.Session] = {}
+_openai_clients: Dict[str, object] = {}
+
+
+def _pool_size() -> int:
+    return int(os.getenv("UPSTREAM_POOL_SIZE", "32"))
+
+
+def _max_retries() -> int:
+    return int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+
+
+def get_timeout(name: str) -> Tuple[float, float]:
+    """(connect, read) timeout for an upstream, for use with requests."""
+    connect = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+    read = float(os.getenv(f"{name.upper()}_TIMEOUT", _DEFAULT_READ_TIMEOUTS.get(name, 30.0)))
+    return connect, read
+
+
+def _reset_after_fork() -> None:
+    """Forget clients inherited from the parent; their sockets belong to it."""
+    global _lock, _pid
+    _lock = threading.RLock()
+    _pid = os.getpid()
+    _sessions.clear()
+    _openai_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _check_pid() -> None:
+    # Fallback for fork paths that bypass register_at_fork hooks
+    if os.getpid() != _pid:
+        _reset_after_fork()
+
+
+def get_http_session(name: str) -> requests.Session:
+    """Keep-alive requests.Session for the named upstream, with retries."""
+    _check_pid()
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            retry = Retry(
+                total=_max_retries(),
+                backoff_factor=float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.5")),
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "POST"]),
+                raise_on_status=False,
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=_pool_size(),
+                max_retries=retry,
+                pool_block=False,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[name] = session
+    return session
+
+
+def get_openai_client(api_key: str):
+    """Shared OpenAI client for an API key, backed by a pooled httpx client."""
+    _check_pid()
+    client = _openai_clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            import httpx
+            from openai import DefaultHttpxClient, OpenAI
+
+            connect, read = get_timeout("openai")
+            pool_size = _pool_size()
+            client = OpenAI(
+                api_key=api_key,
+                max_retries=_max_retries(),
+                timeout=httpx.Timeout(read, connect=connect),
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                    ),
+                ),
+            )
+            _openai_clients[api_key] = client
+    return client
+
+
+def status() -> Dict[str, object]:
+    """Which upstream clients have been built in this process."""
+    with _lock:
+        return {
+            "pid": _pid,
+            "http_sessions": sorted(_sessions),
+            "openai_clients": len(_openai_clients),
+            "pool_size": _pool_size(),
+        }
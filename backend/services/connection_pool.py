@@ -0,0 +1,217 @@
+"""
+Bounded, thread-safe pool for database connections.
+
+- At most `max_size` connections exist at once; callers wait (up to
+  `checkout_timeout`) when all of them are in use.
+- Connections are health-checked on checkout: closed ones are always
+  replaced, and ones idle for longer than `validate_after` seconds are
+  pinged with `validate` first.
+- Connections idle for longer than `idle_timeout` are closed and recycled.
+- `prewarm()` opens connections ahead of the first request.
+- `stats()` reports wait times, in-use/idle counts and reconnects.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Generic connection pool; the connection type is defined by the callables passed in."""
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 8, min_size: int = 0,
+                 idle_timeout: float = 600.0, validate_after: float = 30.0,
+                 checkout_timeout: float = 30.0,
+                 validate: Optional[Callable[[Any], None]] = None,
+                 is_closed: Optional[Callable[[Any], bool]] = None,
+                 close: Optional[Callable[[Any], None]] = None,
+                 name: str = "pool"):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.checkout_timeout = checkout_timeout
+        self.validate = validate
+        self.is_closed = is_closed or (lambda conn: False)
+        self.close_conn = close or (lambda conn: conn.close())
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._idle: deque = deque()  # (conn, last_used) pairs, most recent on the right
+        self._size = 0
+        self._pid = os.getpid()
+        self._metrics = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "reconnects": 0,
+            "recycled_idle": 0,
+        }
+
+    def _check_pid(self) -> None:
+        # Connections inherited across fork belong to the parent process
+        if self._pid != os.getpid():
+            self._cond = threading.Condition()
+            self._idle = deque()
+            self._size = 0
+            self._pid = os.getpid()
+
+    def _discard(self, conn: Any) -> None:
+        try:
+            self.close_conn(conn)
+        except Exception as e:
+            print(f"⚠️  [{self.name}] Error closing connection: {e}")
+
+    def _healthy(self, conn: Any, idle_for: float) -> bool:
+        try:
+            if self.is_closed(conn):
+                return False
+            if self.validate is not None and idle_for >= self.validate_after:
+                self.validate(conn)
+            return True
+        except Exception as e:
+            print(f"⚠️  [{self.name}] Health check failed: {e}")
+            return False
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        self._check_pid()
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            stale = []
+            conn = None
+            create = False
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    # Recycle connections that sat idle too long (oldest are on the left)
+                    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                        stale.append(self._idle.popleft()[0])
+                        self._size -= 1
+                        self._metrics["recycled_idle"] += 1
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"[{self.name}] No connection available after {timeout:.1f}s "
+                            f"({self._size} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                self._discard(old)
+
+            if create:
+                try:
+                    conn = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._metrics["created"] += 1
+            elif not self._healthy(conn, time.monotonic() - last_used):
+                self._discard(conn)
+                with self._cond:
+                    self._size -= 1
+                    self._metrics["reconnects"] += 1
+                    self._cond.notify()
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_seconds_total"] += waited
+                self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+            return conn
+
+    def _release(self, conn: Any) -> None:
+        if self._pid != os.getpid():
+            return
+        broken = False
+        try:
+            broken = self.is_closed(conn)
+        except Exception:
+            broken = True
+        if broken:
+            self._discard(conn)
+        with self._cond:
+            if broken:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Check out a connection for the duration of the with-block."""
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """Open connections until `count` (default min_size) are idle. Returns how many were opened."""
+        self._check_pid()
+        target = self.min_size if count is None else min(count, self.max_size)
+        opened = 0
+        while True:
+            with self._cond:
+                if len(self._idle) >= target or self._size >= self.max_size:
+                    return opened
+                self._size += 1
+            try:
+                conn = self.factory()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._metrics["created"] += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def close_all(self) -> None:
+        """Close every idle connection. Checked-out connections are closed when returned."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            idle = len(self._idle)
+            stats = dict(self._metrics)
+            stats.update({
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_seconds_avg"] = round(stats["wait_seconds_total"] / checkouts, 6) if checkouts else 0.0
+        return stats
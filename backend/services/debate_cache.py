@@ -0,0 +1,102 @@
+"""
+Read-through cache in front of the debate storage service.
+
+Saved debates are immutable, so individual debates are cached for a long
+TTL. List pages change whenever a debate is saved, so they get a short TTL
+and are dropped on every save made through this process. (Other worker
+processes only see the new debate once their list TTL runs out.)
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.lru_cache import LRUCache
+
+
+class CachedDebateStore:
+    """Wraps a debate store (e.g. SnowflakeService) with LRU/TTL caches."""
+
+    def __init__(self, backend, max_debates: Optional[int] = None, debate_ttl: Optional[float] = None,
+                 max_lists: Optional[int] = None, list_ttl: Optional[float] = None):
+        self.backend = backend
+        self.debates = LRUCache(
+            max_debates or int(os.getenv("DEBATE_CACHE_MAX_ENTRIES", "500")),
+            ttl_seconds=debate_ttl or float(os.getenv("DEBATE_CACHE_TTL", "3600")),
+        )
+        self.lists = LRUCache(
+            max_lists or int(os.getenv("DEBATE_LIST_CACHE_MAX_ENTRIES", "100")),
+            ttl_seconds=list_ttl or float(os.getenv("DEBATE_LIST_CACHE_TTL", "30")),
+        )
+
+    def get_debate_summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        debate = self.debates.get(debate_id)
+        if debate is None:
+            debate = self.backend.get_debate_summary(debate_id)
+            # Misses aren't cached: the debate may be saved a moment later
+            if debate is not None:
+                self.debates.set(debate_id, debate)
+        return debate
+
+    def list_debates(self, limit: int = 50, after=None, include_summary: bool = False) -> List[Dict[str, Any]]:
+        key = ("list", limit, after, include_summary)
+        debates = self.lists.get(key)
+        if debates is None:
+            debates = self.backend.list_debates(limit=limit, after=after, include_summary=include_summary)
+            self.lists.set(key, debates)
+        return debates
+
+    def list_debates_page(self, limit: int = 50, cursor: Optional[str] = None,
+                          include_summary: bool = False) -> Dict[str, Any]:
+        key = ("page", limit, cursor, include_summary)
+        page = self.lists.get(key)
+        if page is None:
+            page = self.backend.list_debates_page(limit=limit, cursor=cursor, include_summary=include_summary)
+            self.lists.set(key, page)
+        return page
+
+    def save_debate_summary(self, debate_data: Dict[str, Any]) -> bool:
+        success = self.backend.save_debate_summary(debate_data)
+        self.invalidate(debate_data.get("debate_id"))
+        return success
+
+    def save_debate_summaries(self, debates: List[Dict[str, Any]]) -> bool:
+        success = self.backend.save_debate_summaries(debates)
+        for debate_data in debates:
+            self.debates.delete(debate_data.get("debate_id"))
+        self.lists.clear()
+        return success
+
+    def invalidate(self, debate_id: Optional[str] = None) -> None:
+        """Drop a debate (if given) and all cached list pages."""
+        if debate_id is not None:
+            self.debates.delete(debate_id)
+        self.lists.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {"debates": self.debates.stats(), "lists": self.lists.stats()}
+
+    def __getattr__(self, name):
+        # Everything else (init_schema, pool_stats, ...) goes straight to the backend
+        return getattr(self.backend, name)
+
+
+# Singleton instance
+_debate_store = None
+_debate_store_lock = threading.Lock()
+
+
+def get_debate_store():
+    """
+    Get the debate store used by the API: the storage service behind a
+    read-through cache (or the bare service if DEBATE_CACHE_ENABLED=0).
+    """
+    global _debate_store
+    from services.snowflake_service import get_debate_backend
+
+    if os.getenv("DEBATE_CACHE_ENABLED", "1") == "0":
+        return get_debate_backend()
+    if _debate_store is None:
+        with _debate_store_lock:
+            if _debate_store is None:
+                _debate_store = CachedDebateStore(get_debate_backend())
+    return _debate_store
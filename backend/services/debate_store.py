@@ -0,0 +1,186 @@
+"""
+Storage backend interface for debates, plus the row-shaping helpers shared
+by its implementations (Snowflake and the local SQLite backend).
+
+Rows come back as dicts with UPPERCASE column names (Snowflake's DictCursor
+convention), and get_debate_summary attaches FALLACIES / fact_checks to each
+turn, which is the format the frontend expects.
+"""
+import base64
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEBATE_COLUMNS = ["debate_id", "topic", "speaker_a", "speaker_b", "total_turns", "summary"]
+TURN_COLUMNS = ["turn_id", "debate_id", "turn_number", "speaker", "transcript", "duration_seconds"]
+FALLACY_COLUMNS = ["fallacy_id", "turn_id", "fallacy_type", "explanation", "text_segment", "confidence"]
+FACT_CHECK_COLUMNS = ["fact_check_id", "turn_id", "claim", "verdict", "explanation", "confidence", "sources"]
+
+
+def build_debate_rows(debate_data: Dict[str, Any]) -> Dict[str, List[tuple]]:
+    """
+    Flatten a debate payload into row tuples per table, in the column order
+    of DEBATE_COLUMNS, TURN_COLUMNS, FALLACY_COLUMNS and FACT_CHECK_COLUMNS.
+    Fact-check sources are serialized to a JSON string.
+    """
+    rows = {"debates": [], "debate_turns": [], "fallacies": [], "fact_checks": []}
+    rows["debates"].append((
+        debate_data.get('debate_id'),
+        debate_data.get('topic', 'No topic'),
+        debate_data.get('speaker_a', 'Speaker A'),
+        debate_data.get('speaker_b', 'Speaker B'),
+        len(debate_data.get('turns', [])),
+        debate_data.get('summary', '')
+    ))
+    
+    for turn in debate_data.get('turns', []):
+        turn_id = turn.get('turn_id') or f"{debate_data['debate_id']}_turn_{turn.get('turn_number')}"
+        rows["debate_turns"].append((
+            turn_id,
+            debate_data.get('debate_id'),
+            turn.get('turn_number'),
+            turn.get('speaker'),
+            turn.get('transcript'),
+            turn.get('duration', 0)
+        ))
+        
+        for fallacy in turn.get('fallacies', []):
+            fallacy_id = fallacy.get('id') or f"{turn_id}_fallacy_{hash(fallacy.get('type'))}"
+            rows["fallacies"].append((
+                fallacy_id,
+                turn_id,
+                fallacy.get('type'),
+                fallacy.get('explanation'),
+                fallacy.get('text_segment', ''),
+                fallacy.get('confidence', 0.0)
+            ))
+        
+        for fact_check in turn.get('fact_checks', []):
+            fact_check_id = fact_check.get('id') or f"{turn_id}_fact_{hash(fact_check.get('claim'))}"
+            sources = fact_check.get('sources')
+            
+            # Handle None/null sources properly
+            if sources is None or sources == []:
+                sources_json = '[]'
+            else:
+                sources_json = json.dumps(sources)
+            
+            rows["fact_checks"].append((
+                fact_check_id,
+                turn_id,
+                fact_check.get('claim'),
+                fact_check.get('verdict'),
+                fact_check.get('explanation'),
+                fact_check.get('confidence', 0.0),
+                sources_json
+            ))
+    return rows
+
+
+def attach_turn_details(turns: List[Dict[str, Any]], fallacies_raw: List[Dict[str, Any]],
+                        fact_checks_raw: List[Dict[str, Any]]) -> None:
+    """
+    Group fallacy and fact-check rows by TURN_ID and attach them to their turns
+    as turn['FALLACIES'] (frontend format) and turn['fact_checks'] (raw rows).
+    """
+    fallacies_by_turn: Dict[Any, List[Dict[str, Any]]] = {}
+    for f in fallacies_raw:
+        fallacies_by_turn.setdefault(f.get('TURN_ID'), []).append(f)
+    fact_checks_by_turn: Dict[Any, List[Dict[str, Any]]] = {}
+    for fc in fact_checks_raw:
+        fact_checks_by_turn.setdefault(fc.get('TURN_ID'), []).append(fc)
+    
+    for turn in turns:
+        turn_id = turn['TURN_ID']
+        
+        # Transform fallacies to match frontend format
+        turn['FALLACIES'] = [
+            {
+                'type': f.get('FALLACY_TYPE', ''),
+                'severity': 'medium',  # Default severity if not stored
+                'explanation': f.get('EXPLANATION', ''),
+                'quote': f.get('TEXT_SEGMENT', '')
+            }
+            for f in fallacies_by_turn.get(turn_id, [])
+        ]
+        turn['fact_checks'] = fact_checks_by_turn.get(turn_id, [])
+
+
+# Columns returned by list_debates (SUMMARY only on request)
+LIST_COLUMNS = ["debate_id", "topic", "speaker_a", "speaker_b", "created_at", "total_turns", "status"]
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Opaque page cursor for a (created_at, debate_id) key."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        created_at, debate_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    return str(created_at), str(debate_id)
+
+
+def paginate_debates(list_fn, limit: int, cursor: Optional[str], include_summary: bool) -> Dict[str, Any]:
+    """
+    Run list_fn(limit=..., after=..., include_summary=...) for one page.
+    Fetches one extra row to tell whether another page exists.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows = list_fn(limit=limit + 1, after=after, include_summary=include_summary)
+    next_cursor = encode_cursor(rows[limit - 1]['CURSOR_KEY']) if len(rows) > limit else None
+    rows = rows[:limit]
+    for row in rows:
+        row.pop('CURSOR_KEY', None)
+    return {"debates": rows, "next_cursor": next_cursor}
+
+
+class DebateStore(ABC):
+    """
+    Interface every storage backend implements. Backends are selected by
+    get_debate_backend() from LIBRA_STORAGE_BACKEND.
+    """
+    
+    @abstractmethod
+    def init_schema(self):
+        """Create the debates, debate_turns, fallacies and fact_checks tables."""
+    
+    @abstractmethod
+    def save_debate_summary(self, debate_data: Dict[str, Any]) -> bool:
+        """Save a debate with its turns, fallacies and fact checks in one transaction."""
+    
+    def save_debate_summaries(self, debates: List[Dict[str, Any]]) -> bool:
+        """Save several debates; backends override this to use one transaction."""
+        for debate_data in debates:
+            self.save_debate_summary(debate_data)
+        return True
+    
+    @abstractmethod
+    def get_debate_summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """Return a debate with its turns (FALLACIES / fact_checks attached), or None."""
+    
+    @abstractmethod
+    def list_debates(self, limit: int = 50, after: Optional[Tuple[str, str]] = None,
+                     include_summary: bool = False) -> List[Dict[str, Any]]:
+        """Newest debates first, after the (created_at, debate_id) key; rows carry CURSOR_KEY."""
+    
+    def list_debates_page(self, limit: int = 50, cursor: Optional[str] = None,
+                          include_summary: bool = False) -> Dict[str, Any]:
+        """
+        One page of list_debates plus an opaque next_cursor (None on the last page).
+        """
+        return paginate_debates(self.list_debates, limit, cursor, include_summary)
+    
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """Open connections ahead of the first request. Returns how many were opened."""
+        return 0
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        return {}
+    
+    def close_connection(self):
+        """Release any open connections."""
@@ -0,0 +1,152 @@
+"""
+Job store for long-running analyses.
+
+Work is submitted to a bounded worker pool and tracked by job ID so the
+HTTP request can return immediately; clients then poll for status and
+fetch the result. Finished jobs are kept for JOB_RESULT_TTL seconds.
+
+Job state lives in a SQLite file (JOB_STORE_PATH, default
+LIBRA_CACHE_DIR/jobs.sqlite3) shared by all worker processes, so a poll
+can land on any worker. A job runs in the process that accepted it; if
+that process exits first, the job is reported as failed.
+"""
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from services.local_store import LocalDatabase, get_cache_dir, pid_alive
+from services.tracing import current_trace_id, in_context
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    trace_id TEXT,
+    worker_pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs(finished_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs(worker_pid, status);
+"""
+
+_COLUMNS = ["job_id", "kind", "status", "created_at", "started_at", "finished_at", "result", "error", "trace_id",
+            "worker_pid"]
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are already queued or running."""
+
+
+class JobStore:
+    """Tracks jobs run on a bounded thread pool, expiring finished ones."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None, path: Optional[str] = None):
+        self.max_workers = max_workers or int(os.getenv("JOB_MAX_WORKERS", "4"))
+        self.max_pending = max_pending or int(os.getenv("JOB_MAX_PENDING", "100"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("JOB_RESULT_TTL", "3600"))
+        self.db = LocalDatabase(path or os.getenv("JOB_STORE_PATH")
+                                or os.path.join(get_cache_dir(), "jobs.sqlite3"), _SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Dict[str, Any]:
+        """Queue fn(*args, **kwargs) and return a snapshot of the new job."""
+        self._purge_expired()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "trace_id": current_trace_id(),
+            "worker_pid": os.getpid(),
+        }
+        with self._lock:
+            # The pool is per process, so only this process's jobs count against it
+            active = self.db.connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE worker_pid = ? AND status IN ('queued', 'running')",
+                (job["worker_pid"],),
+            ).fetchone()[0]
+            if active >= self.max_pending:
+                raise JobQueueFullError(f"Too many pending jobs ({active})")
+            self.db.connection().execute(
+                f"INSERT INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [job[c] for c in _COLUMNS],
+            )
+
+        # Spans from the job join the trace of the request that submitted it
+        self._executor.submit(in_context(self._run), job["job_id"], kind, fn, args, kwargs)
+        return job
+
+    def _update(self, job_id: str, **fields) -> None:
+        self.db.connection().execute(
+            f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE job_id = ?",
+            (*fields.values(), job_id),
+        )
+
+    def _run(self, job_id: str, kind: str, fn: Callable[..., Any], args, kwargs) -> None:
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            update = {"status": "succeeded", "result": json.dumps(fn(*args, **kwargs))}
+        except Exception as e:
+            traceback.print_exc()
+            update = {"status": "failed", "error": str(e)}
+        self._update(job_id, finished_at=time.time(), **update)
+        print(f"🧾 Job {job_id} ({kind}) {update['status']}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of the job, or None if unknown or expired."""
+        self._purge_expired()
+        row = self.db.connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        if job["status"] in ("queued", "running") and not pid_alive(job["worker_pid"]):
+            job.update(status="failed", error="The worker running this job exited before it finished",
+                       finished_at=time.time())
+            self._update(job_id, status=job["status"], error=job["error"], finished_at=job["finished_at"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _purge_expired(self) -> None:
+        self.db.connection().execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self.db.connection().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ).fetchall())
+        return {"max_workers": self.max_workers, "max_pending": self.max_pending, "jobs": counts}
+
+
+# Singleton instance
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Get or create the job store singleton."""
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = JobStore()
+    return _job_store
@@ -0,0 +1,73 @@
+"""
+Helpers for the small SQLite databases the backend keeps on local disk
+(search cache, verdict cache, ...).
+
+Each database file can be shared by several server worker processes:
+connections use WAL mode plus a busy timeout, and every thread/process
+gets its own connection.
+"""
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+
+def get_cache_dir() -> str:
+    """Return (and create) the directory used for local cache files."""
+    default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+    path = os.getenv("LIBRA_CACHE_DIR", default_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this pid exists (used to spot work left by dead workers)."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def connect(path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for concurrent readers and writers."""
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+class LocalDatabase:
+    """
+    A SQLite file with one connection per thread.
+
+    `schema` is executed once per process on first use. Connections are
+    re-opened after a fork so workers never share a file handle.
+    """
+
+    def __init__(self, path: str, schema: str = ""):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_pid = None
+
+    def connection(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != pid:
+            conn = connect(self.path)
+            self._local.conn = conn
+            self._local.pid = pid
+        if self._schema_pid != pid:
+            with self._lock:
+                if self._schema_pid != pid:
+                    if self.schema:
+                        conn.executescript(self.schema)
+                    self._schema_pid = pid
+        return conn
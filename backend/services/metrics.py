@@ -0,0 +1,405 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Recorded:
+  libra_http_requests_total              requests per route, method and status
+  libra_http_request_errors_total        5xx responses and unhandled exceptions per route
+  libra_http_request_duration_seconds    latency per route (for streaming endpoints:
+                                         until the response starts)
+  libra_http_requests_in_flight          requests being handled right now
+  libra_upstream_request_duration_seconds  latency per upstream call (openai, google,
+                                         elevenlabs, snowflake), by outcome
+  libra_upstream_errors_total            failed upstream calls, by exception type
+  libra_upstream_in_flight               upstream calls in progress
+  libra_openai_tokens_total              prompt/completion tokens reported by OpenAI
+
+Recording a sample is a dict lookup and a few additions under a per-metric
+lock, so it costs microseconds next to the network calls it measures.
+
+Gunicorn workers share one listening socket, so a scrape reaches an
+arbitrary worker. Each worker therefore copies its numbers into a SQLite
+file shared by all workers (METRICS_DB_PATH, default
+LIBRA_CACHE_DIR/metrics.sqlite3) every METRICS_SYNC_INTERVAL seconds
+(default 5) and before it renders, and /metrics reports the sum across
+workers. Counters and histograms of workers that have exited are folded
+into a running total, so they never go backwards when a worker is
+recycled; gauges only count live workers.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.local_store import LocalDatabase, get_cache_dir, pid_alive
+from services.tracing import span
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; upstream calls range from a few ms (cache-warm Snowflake) to a minute (long STT)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], le: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        """This process's values as (suffix, label values, le, value)."""
+        raise NotImplementedError
+
+    def format(self, samples) -> List[str]:
+        """Exposition lines for (suffix, label values, le, value) samples."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{_format_labels(self.labelnames, labels, le)} {_format_value(value)}"
+                     for suffix, labels, le, value in samples)
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [("", labels, "", value) for labels, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        out = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                out.append(("_bucket", labels, _format_value(bound), cumulative))
+            out.append(("_sum", labels, "", total))
+            out.append(("_count", labels, "", cumulative))
+        return out
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+HTTP_REQUESTS = _register(Counter(
+    "libra_http_requests_total", "HTTP requests handled, by route, method and status.",
+    ("route", "method", "status")))
+HTTP_ERRORS = _register(Counter(
+    "libra_http_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception.",
+    ("route", "method")))
+HTTP_LATENCY = _register(Histogram(
+    "libra_http_request_duration_seconds", "Time to produce the response, by route.",
+    ("route", "method")))
+HTTP_IN_FLIGHT = _register(Gauge(
+    "libra_http_requests_in_flight", "HTTP requests currently being handled."))
+UPSTREAM_LATENCY = _register(Histogram(
+    "libra_upstream_request_duration_seconds", "Latency of calls to upstream services, by outcome.",
+    ("upstream", "operation", "outcome")))
+UPSTREAM_ERRORS = _register(Counter(
+    "libra_upstream_errors_total", "Failed upstream calls, by exception type.",
+    ("upstream", "operation", "error")))
+UPSTREAM_IN_FLIGHT = _register(Gauge(
+    "libra_upstream_in_flight", "Upstream calls currently in progress.", ("upstream",)))
+OPENAI_TOKENS = _register(Counter(
+    "libra_openai_tokens_total", "Tokens reported in OpenAI responses.",
+    ("model", "operation", "kind")))
+
+
+@contextmanager
+def upstream(name: str, operation: str):
+    """
+    Time a call to an upstream service: `with upstream("google", "search"): ...`
+    The call is also recorded as a "<name>.<operation>" tracing span.
+    """
+    labels = (name,)
+    UPSTREAM_IN_FLIGHT.inc(labels)
+    start = time.perf_counter()
+    try:
+        with span(f"{name}.{operation}"):
+            yield
+    except BaseException as e:
+        UPSTREAM_LATENCY.observe((name, operation, "error"), time.perf_counter() - start)
+        UPSTREAM_ERRORS.inc((name, operation, type(e).__name__))
+        raise
+    else:
+        UPSTREAM_LATENCY.observe((name, operation, "ok"), time.perf_counter() - start)
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(labels)
+
+
+def record_openai_usage(response, operation: str) -> None:
+    """Count the tokens of a chat completion response (no-op if it has no usage)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    model = getattr(response, "model", None) or "unknown"
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None)
+        if count:
+            OPENAI_TOKENS.inc((model, operation, kind[:-len("_tokens")]), count)
+
+
+def init_app(app) -> None:
+    """Record latency, status and in-flight count for every request to a Flask app."""
+    from flask import g, request
+
+    def _route() -> str:
+        return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+    shared = _shared_metrics()
+
+    @app.before_request
+    def _metrics_start():
+        if shared is not None:
+            shared.ensure_syncing()
+        g._metrics_start = time.perf_counter()
+        g._metrics_in_flight = True
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _metrics_observe(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            route, method = _route(), request.method
+            HTTP_LATENCY.observe((route, method), time.perf_counter() - start)
+            HTTP_REQUESTS.inc((route, method, str(response.status_code)))
+            if response.status_code >= 500:
+                HTTP_ERRORS.inc((route, method))
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        # Streamed responses can be torn down twice (once more when the body finishes)
+        if not g.pop("_metrics_in_flight", False):
+            return
+        start = g.pop("_metrics_start", None)
+        if exc is not None and start is not None:
+            route, method = _route(), request.method
+            HTTP_LATENCY.observe((route, method), time.perf_counter() - start)
+            HTTP_REQUESTS.inc((route, method, "500"))
+            HTTP_ERRORS.inc((route, method))
+        HTTP_IN_FLIGHT.dec()
+
+
+# -------------------- shared across workers --------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_samples (
+    pid INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    le TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (pid, metric, suffix, labels, le)
+);
+"""
+
+# Rows of workers that have exited are folded into this pid
+_RETIRED = 0
+
+
+class SharedMetrics:
+    """Per-worker snapshots of every metric in one SQLite file, summed on render."""
+
+    def __init__(self, path: Optional[str] = None, interval: Optional[float] = None):
+        self.db = LocalDatabase(path or os.getenv("METRICS_DB_PATH")
+                                or os.path.join(get_cache_dir(), "metrics.sqlite3"), _SCHEMA)
+        self.interval = interval if interval is not None else float(os.getenv("METRICS_SYNC_INTERVAL", "5"))
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    def _retire(self, conn: sqlite3.Connection, pid: int) -> None:
+        """Fold a pid's counters and histograms into the retired totals and drop its rows."""
+        gauges = [m.name for m in _registry if m.kind == "gauge"]
+        conn.execute(
+            f"""
+            INSERT INTO metric_samples (pid, metric, suffix, labels, le, value)
+            SELECT {_RETIRED}, metric, suffix, labels, le, value FROM metric_samples
+            WHERE pid = ? AND metric NOT IN ({",".join("?" * len(gauges))})
+            ON CONFLICT (pid, metric, suffix, labels, le) DO UPDATE SET value = value + excluded.value
+            """,
+            (pid, *gauges),
+        )
+        conn.execute("DELETE FROM metric_samples WHERE pid = ?", (pid,))
+
+    def sync(self) -> None:
+        """Replace this worker's rows with its current values."""
+        pid = os.getpid()
+        rows = [(pid, metric.name, suffix, json.dumps(labels), le, value)
+                for metric in _registry for suffix, labels, le, value in metric.samples()]
+        with self._sync_lock:
+            conn = self.db.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._synced_pid != pid:
+                    # Rows under our pid were left by an exited process that had it before us
+                    self._retire(conn, pid)
+                else:
+                    conn.execute("DELETE FROM metric_samples WHERE pid = ?", (pid,))
+                conn.executemany(
+                    "INSERT INTO metric_samples (pid, metric, suffix, labels, le, value) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._synced_pid = pid
+
+    def collect(self) -> Dict[str, List[Tuple[str, Tuple[str, ...], str, float]]]:
+        """Samples summed across workers, by metric name; retires workers that have exited."""
+        conn = self.db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            pids = [row[0] for row in conn.execute("SELECT DISTINCT pid FROM metric_samples WHERE pid != ?",
+                                                   (_RETIRED,))]
+            for pid in pids:
+                if not pid_alive(pid):
+                    self._retire(conn, pid)
+            rows = conn.execute(
+                "SELECT metric, suffix, labels, le, SUM(value) FROM metric_samples "
+                "GROUP BY metric, suffix, labels, le"
+            ).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        collected: Dict[str, List[Tuple[str, Tuple[str, ...], str, float]]] = {}
+        for metric, suffix, labels, le, value in rows:
+            collected.setdefault(metric, []).append((suffix, tuple(json.loads(labels)), le, value))
+        return collected
+
+    def ensure_syncing(self) -> None:
+        """Start this process's background sync thread (no-op if it's running)."""
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="metrics-sync", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️  Metrics sync failed: {e}")
+            time.sleep(self.interval)
+
+
+_SUFFIX_ORDER = {"_bucket": 0, "_sum": 1, "_count": 2, "": 0}
+
+
+def _sort_key(sample):
+    suffix, labels, le, _ = sample
+    return labels, _SUFFIX_ORDER[suffix], float(le) if le else 0.0
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def _shared_metrics() -> Optional[SharedMetrics]:
+    global _shared
+    if os.getenv("METRICS_SHARED", "1") == "0":
+        return None
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = SharedMetrics()
+    return _shared
+
+
+def sync() -> None:
+    """Write this worker's numbers to the shared file now (e.g. before it exits)."""
+    shared = _shared_metrics()
+    if shared is not None:
+        shared.sync()
+
+
+def render() -> str:
+    """All metrics, summed across workers, in the Prometheus text exposition format."""
+    shared = _shared_metrics()
+    collected = None
+    if shared is not None:
+        try:
+            shared.sync()
+            collected = shared.collect()
+        except sqlite3.Error as e:
+            print(f"⚠️  Shared metrics unavailable, reporting this worker only: {e}")
+    lines: List[str] = []
+    for metric in _registry:
+        samples = collected.get(metric.name, []) if collected is not None else metric.samples()
+        lines.extend(metric.format(sorted(samples, key=_sort_key)))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,310 @@
+"""
+Write-behind queue for saving debates.
+
+With SAVE_DEBATE_MODE=write_behind, /api/save_debate appends the debate to
+a durable local journal (SQLite, in LIBRA_CACHE_DIR) and returns 202. A
+background flusher saves pending debates to the storage backend in batches,
+retrying failures with exponential backoff. Entries that were pending or
+mid-flush when the process stopped are picked up again on restart.
+
+The journal can be shared by several worker processes: each batch is
+claimed inside a write transaction, and claims held by a process that no
+longer exists (or older than SAVE_QUEUE_LEASE seconds) are released.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from services.local_store import LocalDatabase, get_cache_dir, pid_alive
+from services.tracing import span
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_saves (
+    debate_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    enqueued_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_by INTEGER,
+    claimed_at REAL,
+    saved_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pending_saves_due ON pending_saves(status, next_attempt_at);
+"""
+
+# Journal statuses
+PENDING = "pending"
+FLUSHING = "flushing"
+SAVED = "saved"
+FAILED = "failed"
+
+
+class SaveQueue:
+    """Durable journal of debates to save, flushed by a background thread."""
+
+    def __init__(self, store=None, path: Optional[str] = None):
+        # store: anything with save_debate_summaries(); defaults to the API's debate store
+        self._store = store
+        self.db = LocalDatabase(path or os.getenv("SAVE_JOURNAL_PATH")
+                                or os.path.join(get_cache_dir(), "save_journal.sqlite3"), _SCHEMA)
+        self.batch_size = int(os.getenv("SAVE_QUEUE_BATCH_SIZE", "20"))
+        self.flush_interval = float(os.getenv("SAVE_QUEUE_FLUSH_INTERVAL", "1"))
+        self.max_attempts = int(os.getenv("SAVE_QUEUE_MAX_ATTEMPTS", "10"))
+        self.backoff = float(os.getenv("SAVE_QUEUE_BACKOFF", "2"))
+        self.max_backoff = float(os.getenv("SAVE_QUEUE_MAX_BACKOFF", "300"))
+        self.lease_seconds = float(os.getenv("SAVE_QUEUE_LEASE", "300"))
+        self.retention = float(os.getenv("SAVE_QUEUE_RETENTION", "86400"))
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._last_flush: Dict[str, Any] = {}
+
+    @property
+    def store(self):
+        if self._store is None:
+            from services.debate_cache import get_debate_store
+            self._store = get_debate_store()
+        return self._store
+
+    # -------------------- journal --------------------
+    def enqueue(self, debate_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Durably record a debate for saving and wake the flusher."""
+        debate_id = debate_data.get("debate_id")
+        if not debate_id:
+            raise ValueError("debate_id is required")
+        now = time.time()
+        self.db.connection().execute(
+            "INSERT OR REPLACE INTO pending_saves "
+            "(debate_id, payload, status, attempts, enqueued_at, next_attempt_at) VALUES (?, ?, ?, 0, ?, ?)",
+            (debate_id, json.dumps(debate_data), PENDING, now, now),
+        )
+        self.start()
+        self._wake.set()
+        return {"debate_id": debate_id, "status": PENDING, "enqueued_at": now}
+
+    def status(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.connection().execute(
+            "SELECT debate_id, status, attempts, last_error, enqueued_at, next_attempt_at, saved_at "
+            "FROM pending_saves WHERE debate_id = ?", (debate_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ["debate_id", "status", "attempts", "last_error", "enqueued_at", "next_attempt_at", "saved_at"]
+        return dict(zip(keys, row))
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self.db.connection()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM pending_saves GROUP BY status").fetchall())
+        oldest = conn.execute(
+            "SELECT MIN(enqueued_at) FROM pending_saves WHERE status IN (?, ?)", (PENDING, FLUSHING)
+        ).fetchone()[0]
+        with self._lock:
+            last_flush = dict(self._last_flush)
+        return {
+            "counts": {s: counts.get(s, 0) for s in (PENDING, FLUSHING, SAVED, FAILED)},
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "flusher_running": self._thread is not None and self._thread.is_alive()
+                               and self._thread_pid == os.getpid(),
+            "last_flush": last_flush,
+            "batch_size": self.batch_size,
+            "max_attempts": self.max_attempts,
+        }
+
+    def retry_failed(self) -> int:
+        """Put entries that ran out of attempts back in the queue."""
+        cur = self.db.connection().execute(
+            "UPDATE pending_saves SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?",
+            (PENDING, time.time(), FAILED),
+        )
+        self._wake.set()
+        return cur.rowcount
+
+    def _release_stale_claims(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        rows = conn.execute(
+            "SELECT debate_id, claimed_by, claimed_at FROM pending_saves WHERE status = ?", (FLUSHING,)
+        ).fetchall()
+        stale = [debate_id for debate_id, pid, claimed_at in rows
+                 if not pid_alive(pid) or (claimed_at or 0) < now - self.lease_seconds]
+        if stale:
+            conn.executemany(
+                "UPDATE pending_saves SET status = ?, claimed_by = NULL WHERE debate_id = ? AND status = ?",
+                [(PENDING, debate_id, FLUSHING) for debate_id in stale],
+            )
+            print(f"🔁 Save queue: replaying {len(stale)} interrupted save(s)")
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        conn = self.db.connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._release_stale_claims(conn)
+            rows = conn.execute(
+                "SELECT debate_id, payload, attempts, claimed_at FROM pending_saves "
+                "WHERE status = ? AND next_attempt_at <= ? ORDER BY enqueued_at LIMIT ?",
+                (PENDING, now, self.batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE pending_saves SET status = ?, claimed_by = ?, claimed_at = ? WHERE debate_id = ?",
+                [(FLUSHING, os.getpid(), now, debate_id) for debate_id, _, _, _ in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # claimed_at is cleared by enqueue(), so it is only set here for entries
+        # claimed before: retried, or replayed after a flush was interrupted
+        return [{"debate_id": d, "payload": json.loads(p), "attempts": a, "claimed_before": c is not None}
+                for d, p, a, c in rows]
+
+    def _mark_saved(self, entries: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        self.db.connection().executemany(
+            "UPDATE pending_saves SET status = ?, saved_at = ?, last_error = NULL, claimed_by = NULL "
+            "WHERE debate_id = ? AND status = ?",
+            [(SAVED, now, e["debate_id"], FLUSHING) for e in entries],
+        )
+
+    def _mark_failed(self, entry: Dict[str, Any], error: Exception) -> None:
+        attempts = entry["attempts"] + 1
+        delay = min(self.max_backoff, self.backoff * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+        status = FAILED if attempts >= self.max_attempts else PENDING
+        # A re-enqueue during the flush resets the row to pending; leave that alone
+        self.db.connection().execute(
+            "UPDATE pending_saves SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, "
+            "claimed_by = NULL WHERE debate_id = ? AND status = ?",
+            (status, attempts, str(error)[:1000], time.time() + delay, entry["debate_id"], FLUSHING),
+        )
+        print(f"⚠️  Save queue: debate {entry['debate_id']} attempt {attempts} failed "
+              f"({'giving up' if status == FAILED else f'retry in {delay:.1f}s'}): {error}")
+
+    def _already_saved(self, entry: Dict[str, Any]) -> bool:
+        # A retried batch may have committed before the error reached us, and an
+        # interrupted flush may have committed before the entry was marked saved
+        if not entry["claimed_before"]:
+            return False
+        try:
+            return self.store.get_debate_summary(entry["debate_id"]) is not None
+        except Exception:
+            return False
+
+    # -------------------- flushing --------------------
+    def flush_once(self) -> int:
+        """Save one batch of due entries. Returns how many were saved."""
+        entries = self._claim_batch()
+        if not entries:
+            return 0
+        done = [e for e in entries if self._already_saved(e)]
+        todo = [e for e in entries if e not in done]
+        start = time.time()
+        with span("save_queue.flush", root=True, debates=len(entries)):
+            try:
+                if todo:
+                    self.store.save_debate_summaries([e["payload"] for e in todo])
+                done.extend(todo)
+            except Exception as e:
+                if len(todo) == 1:
+                    self._mark_failed(todo[0], e)
+                else:
+                    # Save one at a time so one bad debate doesn't hold back the rest
+                    for entry in todo:
+                        try:
+                            self.store.save_debate_summaries([entry["payload"]])
+                            done.append(entry)
+                        except Exception as single_error:
+                            self._mark_failed(entry, single_error)
+        self._mark_saved(done)
+        with self._lock:
+            self._last_flush = {
+                "at": time.time(),
+                "saved": len(done),
+                "failed": len(entries) - len(done),
+                "ms": round((time.time() - start) * 1000, 1),
+            }
+        if done:
+            print(f"💾 Save queue: flushed {len(done)} debate(s)")
+        return len(done)
+
+    def _purge_saved(self) -> None:
+        self.db.connection().execute(
+            "DELETE FROM pending_saves WHERE status = ? AND saved_at < ?", (SAVED, time.time() - self.retention)
+        )
+
+    def _run(self) -> None:
+        last_purge = 0.0
+        while not self._stop.is_set():
+            try:
+                # Keep going while full batches come back
+                while self.flush_once() >= self.batch_size:
+                    pass
+                if time.time() - last_purge > 3600:
+                    self._purge_saved()
+                    last_purge = time.time()
+            except Exception as e:
+                print(f"❌ Save queue flusher error: {e}")
+                traceback.print_exc()
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start the flusher thread in this process (no-op if it's running)."""
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="save-queue", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self, timeout: float = 10.0) -> int:
+        """
+        Stop the flusher and save whatever is due, for up to `timeout`
+        seconds (used on shutdown). Anything left stays in the journal and
+        is replayed on the next start. Returns how many debates were saved.
+        """
+        self.stop(timeout=min(timeout, 5.0))
+        deadline = time.monotonic() + timeout
+        saved = 0
+        while time.monotonic() < deadline:
+            flushed = self.flush_once()
+            saved += flushed
+            if flushed == 0:
+                break
+        return saved
+
+
+def write_behind_enabled() -> bool:
+    return os.getenv("SAVE_DEBATE_MODE", "sync").lower() == "write_behind"
+
+
+# Singleton instance
+_save_queue = None
+_save_queue_lock = threading.Lock()
+
+
+def get_save_queue() -> SaveQueue:
+    """Get or create the save queue singleton."""
+    global _save_queue
+    if _save_queue is None:
+        with _save_queue_lock:
+            if _save_queue is None:
+                _save_queue = SaveQueue()
+    return _save_queue
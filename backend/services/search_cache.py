@@ -0,0 +1,154 @@
+"""
+Disk-backed cache for Google Custom Search results.
+
+Entries are keyed on the normalized query plus the number of results
+requested, expire after a TTL, and the least recently used entries are
+evicted once the cache grows past its size cap. The cache lives in a
+SQLite file so it can be shared by multiple server worker processes.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.local_store import LocalDatabase, get_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    cache_key TEXT PRIMARY KEY,
+    query TEXT,
+    num INTEGER,
+    results TEXT,
+    created_at REAL,
+    expires_at REAL,
+    last_access REAL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_last_access ON search_cache(last_access);
+"""
+
+# How many writes between size-cap checks
+_EVICT_EVERY = 50
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop surrounding punctuation/quotes."""
+    query = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    return query.strip(" .,;:!?\"'")
+
+
+class SearchCache:
+    """TTL + LRU cache of search results stored in SQLite."""
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path or os.path.join(get_cache_dir(), "search_cache.sqlite3")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("SEARCH_CACHE_TTL", "604800"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "50000"))
+        self.db = LocalDatabase(self.path, _SCHEMA)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(query: str, num: int) -> str:
+        return hashlib.sha1(f"{normalize_query(query)}|{num}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, num: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for (query, num), or None on a miss."""
+        key = self._key(query, num)
+        now = time.time()
+        try:
+            conn = self.db.connection()
+            row = conn.execute(
+                "SELECT results FROM search_cache WHERE cache_key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE search_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+        except sqlite3.Error as e:
+            print(f"⚠️  Search cache read failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, query: str, num: int, results: List[Dict[str, Any]]) -> None:
+        """Store results for (query, num)."""
+        now = time.time()
+        try:
+            conn = self.db.connection()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO search_cache
+                    (cache_key, query, num, results, created_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (self._key(query, num), normalize_query(query), num, json.dumps(results),
+                 now, now + self.ttl_seconds, now),
+            )
+            with self._lock:
+                self._writes += 1
+                check = self._writes % _EVICT_EVERY == 0
+            if check:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"⚠️  Search cache write failed: {e}")
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones above the size cap."""
+        conn = self.db.connection()
+        removed = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        if count > self.max_entries:
+            removed += conn.execute(
+                """
+                DELETE FROM search_cache WHERE cache_key IN (
+                    SELECT cache_key FROM search_cache ORDER BY last_access LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            ).rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        try:
+            entries = self.db.connection().execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Singleton instance
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Get or create the search cache singleton (None if SEARCH_CACHE_ENABLED=0)."""
+    global _search_cache
+    if os.getenv("SEARCH_CACHE_ENABLED", "1") == "0":
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache()
+    return _search_cache
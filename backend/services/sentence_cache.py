@@ -0,0 +1,149 @@
+"""
+Per-sentence cache of fallacy labels.
+
+A label depends on the sentence and on the sentences around it, so entries
+are keyed on the model ID, the sentence text and a hash of its local
+context window. Re-sent transcripts (retries, edits, full-speaker
+aggregates) then only need the new or changed sentences classified.
+
+Entries live in an in-memory LRU; with FALLACY_CACHE_PERSIST=1 they are
+also written to a SQLite file shared by all worker processes.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.local_store import LocalDatabase, get_cache_dir
+from services.lru_cache import LRUCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentence_labels (
+    cache_key TEXT PRIMARY KEY,
+    label TEXT,
+    confidence REAL,
+    last_access REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sentence_labels_last_access ON sentence_labels(last_access);
+"""
+
+# How many writes between size-cap checks of the persistent store
+_EVICT_EVERY = 200
+
+
+def _norm(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+class SentenceLabelCache:
+    """LRU (plus optional SQLite) cache of {label, confidence} per sentence in context."""
+
+    def __init__(self, max_entries: Optional[int] = None, context: Optional[int] = None,
+                 persist: Optional[bool] = None, path: Optional[str] = None):
+        self.context = context if context is not None else int(os.getenv("FALLACY_CONTEXT_SENTENCES", "2"))
+        self.memory = LRUCache(max_entries or int(os.getenv("FALLACY_CACHE_MAX_ENTRIES", "20000")))
+        if persist is None:
+            persist = os.getenv("FALLACY_CACHE_PERSIST", "0") == "1"
+        self.db = None
+        if persist:
+            self.db = LocalDatabase(path or os.path.join(get_cache_dir(), "sentence_labels.sqlite3"), _SCHEMA)
+        self.max_persisted = int(os.getenv("FALLACY_CACHE_PERSIST_MAX", "200000"))
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def keys_for(self, model_id: str, sentences: List[str]) -> List[str]:
+        """Cache key for every sentence: model + sentence + hash of its neighbours."""
+        normalized = [_norm(s) for s in sentences]
+        keys = []
+        for i, sentence in enumerate(normalized):
+            before = normalized[max(0, i - self.context):i]
+            after = normalized[i + 1:i + 1 + self.context]
+            context_hash = hashlib.sha1("\n".join(before + ["|"] + after).encode("utf-8")).hexdigest()
+            keys.append(hashlib.sha1(f"{model_id}\n{sentence}\n{context_hash}".encode("utf-8")).hexdigest())
+        return keys
+
+    def get_many(self, keys: List[str]) -> Dict[int, Dict[str, Any]]:
+        """Return {position: entry} for the keys that are cached."""
+        found: Dict[int, Dict[str, Any]] = {}
+        missing = []
+        for i, key in enumerate(keys):
+            entry = self.memory.get(key)
+            if entry is not None:
+                found[i] = entry
+            else:
+                missing.append(i)
+
+        if missing and self.db is not None:
+            try:
+                conn = self.db.connection()
+                wanted = {keys[i]: i for i in missing}
+                placeholders = ",".join("?" * len(wanted))
+                rows = conn.execute(
+                    f"SELECT cache_key, label, confidence FROM sentence_labels WHERE cache_key IN ({placeholders})",
+                    list(wanted),
+                ).fetchall()
+                if rows:
+                    conn.execute(
+                        f"UPDATE sentence_labels SET last_access = ? WHERE cache_key IN ({placeholders})",
+                        [time.time(), *wanted],
+                    )
+                for key, label, confidence in rows:
+                    entry = {"label": label, "confidence": confidence}
+                    self.memory.set(key, entry)
+                    found[wanted[key]] = entry
+            except sqlite3.Error as e:
+                print(f"⚠️  Sentence cache read failed: {e}")
+        return found
+
+    def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Store {key: {label, confidence}}."""
+        for key, entry in entries.items():
+            self.memory.set(key, {"label": entry.get("label", "none"), "confidence": entry.get("confidence", 0)})
+
+        if self.db is None or not entries:
+            return
+        now = time.time()
+        try:
+            conn = self.db.connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentence_labels (cache_key, label, confidence, last_access) VALUES (?, ?, ?, ?)",
+                [(key, e.get("label", "none"), e.get("confidence", 0), now) for key, e in entries.items()],
+            )
+            with self._lock:
+                before = self._writes
+                self._writes += len(entries)
+                check = before // _EVICT_EVERY != self._writes // _EVICT_EVERY
+            if check:
+                count = conn.execute("SELECT COUNT(*) FROM sentence_labels").fetchone()[0]
+                if count > self.max_persisted:
+                    conn.execute(
+                        "DELETE FROM sentence_labels WHERE cache_key IN "
+                        "(SELECT cache_key FROM sentence_labels ORDER BY last_access LIMIT ?)",
+                        (count - self.max_persisted,),
+                    )
+        except sqlite3.Error as e:
+            print(f"⚠️  Sentence cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["persistent"] = self.db is not None
+        return stats
+
+
+# Singleton instance
+_sentence_cache = None
+_sentence_cache_lock = threading.Lock()
+
+
+def get_sentence_cache() -> Optional[SentenceLabelCache]:
+    """Get or create the sentence label cache (None if FALLACY_CACHE_ENABLED=0)."""
+    global _sentence_cache
+    if os.getenv("FALLACY_CACHE_ENABLED", "1") == "0":
+        return None
+    if _sentence_cache is None:
+        with _sentence_cache_lock:
+            if _sentence_cache is None:
+                _sentence_cache = SentenceLabelCache()
+    return _sentence_cache
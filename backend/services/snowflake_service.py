@@ -1,27 +1,54 @@
 """
 Snowflake database service for storing debate summaries and analysis results.
 """
+import importlib.util
 import os
-import json
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+from services.connection_pool import ConnectionPool
+from services.metrics import upstream
+from services.debate_store import (
+    DebateStore,
+    DEBATE_COLUMNS,
+    TURN_COLUMNS,
+    FALLACY_COLUMNS,
+    FACT_CHECK_COLUMNS,
+    LIST_COLUMNS,
+    attach_turn_details,
+    build_debate_rows,
+)
+
+# The connector is slow to import, so it's only loaded when the first connection is opened
 try:
-    import snowflake.connector
-    from snowflake.connector import DictCursor
-    SNOWFLAKE_AVAILABLE = True
-except ImportError:
+    SNOWFLAKE_AVAILABLE = importlib.util.find_spec("snowflake.connector") is not None
+except (ImportError, ValueError):
     SNOWFLAKE_AVAILABLE = False
-    print("Warning: snowflake-connector-python not installed. Database features disabled.")
 
+_connector = None
+
+
+def _snowflake_connector():
+    """Import snowflake.connector on first use."""
+    global _connector
+    if _connector is None:
+        import snowflake.connector
+        _connector = snowflake.connector
+    return _connector
 
-class SnowflakeService:
+
+# Max rows per multi-row INSERT statement
+INSERT_BATCH_ROWS = 500
+
+class SnowflakeService(DebateStore):
     """Service for managing debate data in Snowflake database."""
     
     def __init__(self):
         """Initialize Snowflake connection from environment variables."""
         if not SNOWFLAKE_AVAILABLE:
-            self.conn = None
+            print("Warning: snowflake-connector-python not installed. Database features disabled.")
+            self.pool = None
             return
             
         self.account = os.getenv('SNOWFLAKE_ACCOUNT')
@@ -30,22 +57,32 @@ class SnowflakeService:
         self.warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
         self.database = os.getenv('SNOWFLAKE_DATABASE', 'LIBRA_DB')
         self.schema = os.getenv('SNOWFLAKE_SCHEMA', 'PUBLIC')
-        self.conn = None
+        self.pool = ConnectionPool(
+            factory=self._connect,
+            max_size=int(os.getenv('SNOWFLAKE_POOL_SIZE', '8')),
+            min_size=int(os.getenv('SNOWFLAKE_POOL_MIN_SIZE', '1')),
+            idle_timeout=float(os.getenv('SNOWFLAKE_POOL_IDLE_TIMEOUT', '600')),
+            validate_after=float(os.getenv('SNOWFLAKE_POOL_VALIDATE_AFTER', '30')),
+            checkout_timeout=float(os.getenv('SNOWFLAKE_POOL_TIMEOUT', '30')),
+            validate=self._ping,
+            is_closed=lambda conn: conn.is_closed(),
+            name="snowflake"
+        )
         
         # Validate required environment variables
         if not all([self.account, self.user, self.password]):
             print("Warning: Snowflake credentials not fully configured. Set SNOWFLAKE_ACCOUNT, SNOWFLAKE_USER, and SNOWFLAKE_PASSWORD")
     
-    def get_connection(self):
-        """Get or create Snowflake connection."""
+    def _connect(self):
+        """Open a new Snowflake connection with our session context selected."""
         if not SNOWFLAKE_AVAILABLE:
             raise RuntimeError("Snowflake connector not installed. Run: pip install snowflake-connector-python")
             
         if not all([self.account, self.user, self.password]):
             raise ValueError("Snowflake credentials not configured in .env file")
         
-        if self.conn is None or self.conn.is_closed():
-            self.conn = snowflake.connector.connect(
+        with upstream("snowflake", "connect"):
+            conn = _snowflake_connector().connect(
                 account=self.account,
                 user=self.user,
                 password=self.password,
@@ -53,96 +90,145 @@ class SnowflakeService:
                 database=self.database,
                 schema=self.schema
             )
-        return self.conn
+            self._set_session_context(conn)
+        return conn
+    
+    def _set_session_context(self, conn):
+        """Select our database and schema once, when the connection is opened."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"USE DATABASE {self.database}")
+            cursor.execute(f"USE SCHEMA {self.schema}")
+        except Exception as e:
+            # Database may not exist yet; init_schema creates and selects it
+            print(f"⚠️  Could not set Snowflake session context: {e}")
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _execute(cursor, operation: str, sql: str, params=None):
+        """cursor.execute, timed into the snowflake upstream metrics under `operation`."""
+        with upstream("snowflake", operation):
+            return cursor.execute(sql, params)
+    
+    @staticmethod
+    def _ping(conn):
+        cursor = conn.cursor()
+        try:
+            SnowflakeService._execute(cursor, "ping", "SELECT 1")
+        finally:
+            cursor.close()
+    
+    def connection(self):
+        """Check out a pooled connection: `with service.connection() as conn: ...`"""
+        if self.pool is None:
+            raise RuntimeError("Snowflake connector not installed. Run: pip install snowflake-connector-python")
+        return self.pool.connection()
+    
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """Open pool connections ahead of the first request."""
+        if self.pool is None or not all([self.account, self.user, self.password]):
+            return 0
+        opened = self.pool.prewarm(count)
+        if opened:
+            print(f"✅ Snowflake pool pre-warmed with {opened} connection(s)")
+        return opened
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        return self.pool.stats() if self.pool is not None else {}
     
     def close_connection(self):
-        """Close the Snowflake connection."""
-        if self.conn and not self.conn.is_closed():
-            self.conn.close()
+        """Close all idle pooled Snowflake connections."""
+        if self.pool is not None:
+            self.pool.close_all()
     
     def init_schema(self):
         """Initialize database schema for storing debates."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        try:
-            # Create database if it doesn't exist
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
-            cursor.execute(f"USE DATABASE {self.database}")
-            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {self.schema}")
-            cursor.execute(f"USE SCHEMA {self.schema}")
+            try:
+                # Create database if it doesn't exist
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+                cursor.execute(f"USE DATABASE {self.database}")
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {self.schema}")
+                cursor.execute(f"USE SCHEMA {self.schema}")
             
-            # Create debates table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS debates (
-                    debate_id VARCHAR(100) PRIMARY KEY,
-                    topic VARCHAR(500),
-                    speaker_a VARCHAR(200),
-                    speaker_b VARCHAR(200),
-                    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    total_turns INTEGER,
-                    status VARCHAR(50) DEFAULT 'completed',
-                    summary TEXT
-                )
-            """)
+                # Create debates table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS debates (
+                        debate_id VARCHAR(100) PRIMARY KEY,
+                        topic VARCHAR(500),
+                        speaker_a VARCHAR(200),
+                        speaker_b VARCHAR(200),
+                        created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+                        total_turns INTEGER,
+                        status VARCHAR(50) DEFAULT 'completed',
+                        summary TEXT
+                    )
+                """)
             
-            # Create turns table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS debate_turns (
-                    turn_id VARCHAR(100) PRIMARY KEY,
-                    debate_id VARCHAR(100),
-                    turn_number INTEGER,
-                    speaker VARCHAR(10),
-                    transcript TEXT,
-                    duration_seconds INTEGER,
-                    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    FOREIGN KEY (debate_id) REFERENCES debates(debate_id)
-                )
-            """)
+                # Create turns table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS debate_turns (
+                        turn_id VARCHAR(100) PRIMARY KEY,
+                        debate_id VARCHAR(100),
+                        turn_number INTEGER,
+                        speaker VARCHAR(10),
+                        transcript TEXT,
+                        duration_seconds INTEGER,
+                        created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+                        FOREIGN KEY (debate_id) REFERENCES debates(debate_id)
+                    )
+                """)
             
-            # Create fallacies table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS fallacies (
-                    fallacy_id VARCHAR(100) PRIMARY KEY,
-                    turn_id VARCHAR(100),
-                    fallacy_type VARCHAR(100),
-                    explanation TEXT,
-                    text_segment TEXT,
-                    confidence FLOAT,
-                    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    FOREIGN KEY (turn_id) REFERENCES debate_turns(turn_id)
-                )
-            """)
+                # Create fallacies table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS fallacies (
+                        fallacy_id VARCHAR(100) PRIMARY KEY,
+                        turn_id VARCHAR(100),
+                        fallacy_type VARCHAR(100),
+                        explanation TEXT,
+                        text_segment TEXT,
+                        confidence FLOAT,
+                        created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+                        FOREIGN KEY (turn_id) REFERENCES debate_turns(turn_id)
+                    )
+                """)
             
-            # Create fact checks table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS fact_checks (
-                    fact_check_id VARCHAR(100) PRIMARY KEY,
-                    turn_id VARCHAR(100),
-                    claim TEXT,
-                    verdict VARCHAR(50),
-                    explanation TEXT,
-                    confidence FLOAT,
-                    sources VARIANT,
-                    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    FOREIGN KEY (turn_id) REFERENCES debate_turns(turn_id)
-                )
-            """)
+                # Create fact checks table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS fact_checks (
+                        fact_check_id VARCHAR(100) PRIMARY KEY,
+                        turn_id VARCHAR(100),
+                        claim TEXT,
+                        verdict VARCHAR(50),
+                        explanation TEXT,
+                        confidence FLOAT,
+                        sources VARIANT,
+                        created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+                        FOREIGN KEY (turn_id) REFERENCES debate_turns(turn_id)
+                    )
+                """)
             
-            conn.commit()
-            print("✅ Snowflake schema initialized successfully")
+                conn.commit()
+                print("✅ Snowflake schema initialized successfully")
             
-        except Exception as e:
-            print(f"❌ Error initializing schema: {e}")
-            conn.rollback()
-            raise
-        finally:
-            cursor.close()
+            except Exception as e:
+                print(f"❌ Error initializing schema: {e}")
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
     
     def save_debate_summary(self, debate_data: Dict[str, Any]) -> bool:
         """
         Save a complete debate summary to Snowflake.
         
+        Rows are inserted with one multi-row INSERT per table inside a single
+        transaction, so the number of round trips doesn't grow with the
+        number of turns, fallacies or fact checks.
+        
         Args:
             debate_data: Dictionary containing debate information:
                 - debate_id: Unique identifier
@@ -155,104 +241,63 @@ class SnowflakeService:
         Returns:
             True if successful, False otherwise
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self.save_debate_summaries([debate_data])
+    
+    def save_debate_summaries(self, debates: List[Dict[str, Any]]) -> bool:
+        """
+        Save several debates in one transaction (same multi-row INSERTs as
+        save_debate_summary, with the rows of all debates combined).
+        """
+        if not debates:
+            return True
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        try:
-            # Ensure we're using the right database and schema
-            cursor.execute(f"USE DATABASE {self.database}")
-            cursor.execute(f"USE SCHEMA {self.schema}")
-            # Insert debate record
-            cursor.execute("""
-                INSERT INTO debates (
-                    debate_id, topic, speaker_a, speaker_b, 
-                    total_turns, summary
+            try:
+                rows = {"debates": [], "debate_turns": [], "fallacies": [], "fact_checks": []}
+                for debate_data in debates:
+                    for table, table_rows in build_debate_rows(debate_data).items():
+                        rows[table].extend(table_rows)
+                self._execute(cursor, "begin", "BEGIN")
+                self._insert_rows(cursor, "debates", DEBATE_COLUMNS, rows["debates"])
+                self._insert_rows(cursor, "debate_turns", TURN_COLUMNS, rows["debate_turns"])
+                self._insert_rows(cursor, "fallacies", FALLACY_COLUMNS, rows["fallacies"])
+                # sources is VARIANT: PARSE_JSON isn't allowed in a VALUES list, so select from it
+                self._insert_rows(
+                    cursor, "fact_checks", FACT_CHECK_COLUMNS, rows["fact_checks"],
+                    select_exprs=[f"column{i}" for i in range(1, len(FACT_CHECK_COLUMNS))]
+                    + [f"PARSE_JSON(column{len(FACT_CHECK_COLUMNS)})"]
                 )
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                debate_data.get('debate_id'),
-                debate_data.get('topic', 'No topic'),
-                debate_data.get('speaker_a', 'Speaker A'),
-                debate_data.get('speaker_b', 'Speaker B'),
-                len(debate_data.get('turns', [])),
-                debate_data.get('summary', '')
-            ))
-            
-            # Insert turns and their analysis
-            for turn in debate_data.get('turns', []):
-                turn_id = turn.get('turn_id') or f"{debate_data['debate_id']}_turn_{turn.get('turn_number')}"
-                
-                # Insert turn
-                cursor.execute("""
-                    INSERT INTO debate_turns (
-                        turn_id, debate_id, turn_number, speaker, 
-                        transcript, duration_seconds
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    turn_id,
-                    debate_data.get('debate_id'),
-                    turn.get('turn_number'),
-                    turn.get('speaker'),
-                    turn.get('transcript'),
-                    turn.get('duration', 0)
-                ))
-                
-                # Insert fallacies for this turn
-                for fallacy in turn.get('fallacies', []):
-                    fallacy_id = fallacy.get('id') or f"{turn_id}_fallacy_{hash(fallacy.get('type'))}"
-                    cursor.execute("""
-                        INSERT INTO fallacies (
-                            fallacy_id, turn_id, fallacy_type, 
-                            explanation, text_segment, confidence
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (
-                        fallacy_id,
-                        turn_id,
-                        fallacy.get('type'),
-                        fallacy.get('explanation'),
-                        fallacy.get('text_segment', ''),
-                        fallacy.get('confidence', 0.0)
-                    ))
-                
-                # Insert fact checks for this turn
-                for fact_check in turn.get('fact_checks', []):
-                    fact_check_id = fact_check.get('id') or f"{turn_id}_fact_{hash(fact_check.get('claim'))}"
-                    sources = fact_check.get('sources')
-                    
-                    # Handle None/null sources properly
-                    if sources is None or sources == []:
-                        sources_json = '[]'
-                    else:
-                        sources_json = json.dumps(sources)
-                    
-                    cursor.execute("""
-                        INSERT INTO fact_checks (
-                            fact_check_id, turn_id, claim, verdict, 
-                            explanation, confidence, sources
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, PARSE_JSON(%s))
-                    """, (
-                        fact_check_id,
-                        turn_id,
-                        fact_check.get('claim'),
-                        fact_check.get('verdict'),
-                        fact_check.get('explanation'),
-                        fact_check.get('confidence', 0.0),
-                        sources_json
-                    ))
+                with upstream("snowflake", "commit"):
+                    conn.commit()
+                ids = ", ".join(str(d.get('debate_id')) for d in debates)
+                print(f"✅ Debate {ids} saved to Snowflake" if len(debates) == 1
+                      else f"✅ {len(debates)} debates saved to Snowflake ({ids})")
+                return True
             
-            conn.commit()
-            print(f"✅ Debate {debate_data.get('debate_id')} saved to Snowflake")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error saving debate: {e}")
-            conn.rollback()
-            raise
-        finally:
-            cursor.close()
+            except Exception as e:
+                print(f"❌ Error saving debate: {e}")
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def _insert_rows(self, cursor, table: str, columns: List[str], rows: List[tuple],
+                     select_exprs: Optional[List[str]] = None):
+        """Insert rows with multi-row INSERT statements of up to INSERT_BATCH_ROWS rows."""
+        if not rows:
+            return
+        row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        for i in range(0, len(rows), INSERT_BATCH_ROWS):
+            batch = rows[i:i + INSERT_BATCH_ROWS]
+            values_sql = ", ".join([row_sql] * len(batch))
+            params = [value for row in batch for value in row]
+            if select_exprs:
+                sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                       f"SELECT {', '.join(select_exprs)} FROM VALUES {values_sql}")
+            else:
+                sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values_sql}"
+            self._execute(cursor, f"insert_{table}", sql, params)
     
     def get_debate_summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -264,108 +309,148 @@ class SnowflakeService:
         Returns:
             Dictionary with debate data or None if not found
         """
-        conn = self.get_connection()
-        cursor = conn.cursor(DictCursor)
+        with self.connection() as conn:
+            cursor = conn.cursor(_snowflake_connector().DictCursor)
         
-        try:
-            # Ensure we're using the right database and schema
-            cursor.execute(f"USE DATABASE {self.database}")
-            cursor.execute(f"USE SCHEMA {self.schema}")
+            try:
+                # Get debate info
+                self._execute(cursor, "get_debate", """
+                    SELECT * FROM debates WHERE debate_id = %s
+                """, (debate_id,))
             
-            # Get debate info
-            cursor.execute("""
-                SELECT * FROM debates WHERE debate_id = %s
-            """, (debate_id,))
+                debate = cursor.fetchone()
+                if not debate:
+                    return None
             
-            debate = cursor.fetchone()
-            if not debate:
-                return None
+                # Get turns
+                self._execute(cursor, "get_turns", """
+                    SELECT * FROM debate_turns 
+                    WHERE debate_id = %s 
+                    ORDER BY turn_number
+                """, (debate_id,))
             
-            # Get turns
-            cursor.execute("""
-                SELECT * FROM debate_turns 
-                WHERE debate_id = %s 
-                ORDER BY turn_number
-            """, (debate_id,))
+                turns = cursor.fetchall()
             
-            turns = cursor.fetchall()
-            
-            # Get fallacies and fact checks for each turn
-            for turn in turns:
-                turn_id = turn['TURN_ID']
-                
-                cursor.execute("""
-                    SELECT * FROM fallacies WHERE turn_id = %s
-                """, (turn_id,))
+                # Get fallacies and fact checks for all turns at once
+                self._execute(cursor, "get_fallacies", """
+                    SELECT * FROM fallacies
+                    WHERE turn_id IN (SELECT turn_id FROM debate_turns WHERE debate_id = %s)
+                """, (debate_id,))
                 fallacies_raw = cursor.fetchall()
-                
-                # Transform fallacies to match frontend format
-                turn['FALLACIES'] = [
-                    {
-                        'type': f.get('FALLACY_TYPE', ''),
-                        'severity': 'medium',  # Default severity if not stored
-                        'explanation': f.get('EXPLANATION', ''),
-                        'quote': f.get('TEXT_SEGMENT', '')
-                    }
-                    for f in fallacies_raw
-                ]
-                
-                cursor.execute("""
-                    SELECT * FROM fact_checks WHERE turn_id = %s
-                """, (turn_id,))
-                turn['fact_checks'] = cursor.fetchall()
             
-            debate['turns'] = turns
-            return debate
+                self._execute(cursor, "get_fact_checks", """
+                    SELECT * FROM fact_checks
+                    WHERE turn_id IN (SELECT turn_id FROM debate_turns WHERE debate_id = %s)
+                """, (debate_id,))
+                fact_checks_raw = cursor.fetchall()
             
-        except Exception as e:
-            print(f"❌ Error retrieving debate: {e}")
-            raise
-        finally:
-            cursor.close()
+                attach_turn_details(turns, fallacies_raw, fact_checks_raw)
+                debate['turns'] = turns
+                return debate
+            
+            except Exception as e:
+                print(f"❌ Error retrieving debate: {e}")
+                raise
+            finally:
+                cursor.close()
     
-    def list_debates(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def list_debates(self, limit: int = 50, after: Optional[Tuple[str, str]] = None,
+                     include_summary: bool = False) -> List[Dict[str, Any]]:
         """
-        List recent debates.
+        List recent debates, newest first.
+        
+        Uses keyset pagination on (created_at, debate_id), so deep pages cost
+        the same as the first one.
         
         Args:
             limit: Maximum number of debates to return
+            after: (created_at, debate_id) of the last row of the previous page,
+                as returned in each row's CURSOR_KEY
+            include_summary: Also return the (large) SUMMARY text column
             
         Returns:
-            List of debate summaries
+            List of debate summaries; each row carries CURSOR_KEY
         """
-        conn = self.get_connection()
-        cursor = conn.cursor(DictCursor)
+        columns = list(LIST_COLUMNS)
+        if include_summary:
+            columns.append("summary")
+        where = ""
+        params: List[Any] = []
+        if after is not None:
+            where = ("WHERE created_at < TO_TIMESTAMP_NTZ(%s) "
+                     "OR (created_at = TO_TIMESTAMP_NTZ(%s) AND debate_id < %s)")
+            params.extend([after[0], after[0], after[1]])
+        params.append(limit)
         
-        try:
-            # Ensure we're using the right database and schema
-            cursor.execute(f"USE DATABASE {self.database}")
-            cursor.execute(f"USE SCHEMA {self.schema}")
-            
-            cursor.execute("""
-                SELECT 
-                    debate_id, topic, speaker_a, speaker_b, 
-                    created_at, total_turns, status, summary
-                FROM debates 
-                ORDER BY created_at DESC 
-                LIMIT %s
-            """, (limit,))
+        with self.connection() as conn:
+            cursor = conn.cursor(_snowflake_connector().DictCursor)
+        
+            try:
+                self._execute(cursor, "list_debates", f"""
+                    SELECT 
+                        {', '.join(columns)},
+                        TO_VARCHAR(created_at, 'YYYY-MM-DD HH24:MI:SS.FF9') AS cursor_ts
+                    FROM debates 
+                    {where}
+                    ORDER BY created_at DESC, debate_id DESC 
+                    LIMIT %s
+                """, params)
             
-            return cursor.fetchall()
+                rows = cursor.fetchall()
+                for row in rows:
+                    row['CURSOR_KEY'] = (row.pop('CURSOR_TS'), row['DEBATE_ID'])
+                return rows
             
-        except Exception as e:
-            print(f"❌ Error listing debates: {e}")
-            raise
-        finally:
-            cursor.close()
+            except Exception as e:
+                print(f"❌ Error listing debates: {e}")
+                raise
+            finally:
+                cursor.close()
 
 
 # Singleton instance
-_snowflake_service = None
+_debate_backend = None
+_debate_backend_lock = threading.Lock()
+
+def get_debate_backend() -> DebateStore:
+    """
+    Get or create the storage backend singleton.
+    
+    LIBRA_STORAGE_BACKEND selects the implementation: 'snowflake' (default)
+    or 'sqlite' for a local embedded database with the same schema and
+    semantics (see services/sqlite_service.py).
+    """
+    global _debate_backend
+    if _debate_backend is None:
+        with _debate_backend_lock:
+            if _debate_backend is None:
+                backend = os.getenv('LIBRA_STORAGE_BACKEND', 'snowflake').lower()
+                if backend == 'sqlite':
+                    from services.sqlite_service import SQLiteDebateService
+                    _debate_backend = SQLiteDebateService()
+                elif backend == 'snowflake':
+                    _debate_backend = SnowflakeService()
+                else:
+                    raise ValueError(f"Unknown LIBRA_STORAGE_BACKEND '{backend}' (expected snowflake or sqlite)")
+    return _debate_backend
+
+
+# Former name, from when Snowflake was the only backend
+get_snowflake_service = get_debate_backend
+
 
-def get_snowflake_service() -> SnowflakeService:
-    """Get or create the Snowflake service singleton."""
-    global _snowflake_service
-    if _snowflake_service is None:
-        _snowflake_service = SnowflakeService()
-    return _snowflake_service
+def storage_status() -> Dict[str, Any]:
+    """Which storage backend is configured and whether it has been initialized."""
+    backend = os.getenv('LIBRA_STORAGE_BACKEND', 'snowflake').lower()
+    if backend == 'snowflake':
+        configured = SNOWFLAKE_AVAILABLE and all(
+            os.getenv(name) for name in ('SNOWFLAKE_ACCOUNT', 'SNOWFLAKE_USER', 'SNOWFLAKE_PASSWORD'))
+    else:
+        configured = backend == 'sqlite'
+    service = _debate_backend
+    return {
+        "backend": backend,
+        "configured": configured,
+        "initialized": service is not None,
+        "pool": service.pool_stats() if service is not None else None,
+    }
@@ -0,0 +1,203 @@
+"""
+Local embedded storage backend (SQLite).
+
+Same tables, columns and method semantics as SnowflakeService, so dev runs,
+small deployments and offline benchmarks don't need a warehouse. Select it
+with LIBRA_STORAGE_BACKEND=sqlite; the file lives at SQLITE_DB_PATH
+(default backend/.data/libra.sqlite3).
+
+Like Snowflake, primary keys are not enforced (they are plain indexed
+columns here), so re-saving a debate behaves the same on both backends.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.debate_store import (
+    DebateStore,
+    DEBATE_COLUMNS,
+    TURN_COLUMNS,
+    FALLACY_COLUMNS,
+    FACT_CHECK_COLUMNS,
+    LIST_COLUMNS,
+    attach_turn_details,
+    build_debate_rows,
+)
+from services.local_store import LocalDatabase
+
+# Millisecond-precision UTC timestamps in a sortable text form
+_NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now'))"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS debates (
+    debate_id VARCHAR(100),
+    topic VARCHAR(500),
+    speaker_a VARCHAR(200),
+    speaker_b VARCHAR(200),
+    created_at TIMESTAMP DEFAULT {_NOW},
+    total_turns INTEGER,
+    status VARCHAR(50) DEFAULT 'completed',
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_debates_id ON debates(debate_id);
+CREATE INDEX IF NOT EXISTS idx_debates_created ON debates(created_at DESC, debate_id DESC);
+
+CREATE TABLE IF NOT EXISTS debate_turns (
+    turn_id VARCHAR(100),
+    debate_id VARCHAR(100),
+    turn_number INTEGER,
+    speaker VARCHAR(10),
+    transcript TEXT,
+    duration_seconds INTEGER,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE INDEX IF NOT EXISTS idx_debate_turns_debate ON debate_turns(debate_id, turn_number);
+
+CREATE TABLE IF NOT EXISTS fallacies (
+    fallacy_id VARCHAR(100),
+    turn_id VARCHAR(100),
+    fallacy_type VARCHAR(100),
+    explanation TEXT,
+    text_segment TEXT,
+    confidence FLOAT,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE INDEX IF NOT EXISTS idx_fallacies_turn ON fallacies(turn_id);
+
+CREATE TABLE IF NOT EXISTS fact_checks (
+    fact_check_id VARCHAR(100),
+    turn_id VARCHAR(100),
+    claim TEXT,
+    verdict VARCHAR(50),
+    explanation TEXT,
+    confidence FLOAT,
+    sources TEXT,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE INDEX IF NOT EXISTS idx_fact_checks_turn ON fact_checks(turn_id);
+"""
+
+
+def _default_db_path() -> str:
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, "libra.sqlite3")
+
+
+def _fetch_dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Rows as dicts keyed by UPPERCASE column name, like Snowflake's DictCursor."""
+    names = [d[0].upper() for d in cursor.description]
+    rows = []
+    for values in cursor.fetchall():
+        row = dict(zip(names, values))
+        if isinstance(row.get('CREATED_AT'), str):
+            row['CREATED_AT'] = datetime.fromisoformat(row['CREATED_AT'])
+        rows.append(row)
+    return rows
+
+
+class SQLiteDebateService(DebateStore):
+    """Service for managing debate data in a local SQLite file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('SQLITE_DB_PATH') or _default_db_path()
+        self.db = LocalDatabase(self.path, _SCHEMA)
+
+    def init_schema(self):
+        """Initialize database schema for storing debates."""
+        self.db.connection().executescript(_SCHEMA)
+        print(f"✅ SQLite schema initialized successfully ({self.path})")
+
+    def save_debate_summary(self, debate_data: Dict[str, Any]) -> bool:
+        """
+        Save a complete debate summary in one transaction.
+
+        Returns:
+            True if successful (errors are re-raised after rollback)
+        """
+        return self.save_debate_summaries([debate_data])
+
+    def save_debate_summaries(self, debates: List[Dict[str, Any]]) -> bool:
+        """Save several debates in one transaction."""
+        if not debates:
+            return True
+        conn = self.db.connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for debate_data in debates:
+                rows = build_debate_rows(debate_data)
+                for table, columns in (("debates", DEBATE_COLUMNS), ("debate_turns", TURN_COLUMNS),
+                                       ("fallacies", FALLACY_COLUMNS), ("fact_checks", FACT_CHECK_COLUMNS)):
+                    if rows[table]:
+                        conn.executemany(
+                            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                            rows[table],
+                        )
+            conn.execute("COMMIT")
+            print(f"✅ Debate {', '.join(str(d.get('debate_id')) for d in debates)} saved to SQLite")
+            return True
+        except Exception as e:
+            print(f"❌ Error saving debate: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def get_debate_summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a debate summary.
+
+        Returns:
+            Dictionary with debate data or None if not found
+        """
+        conn = self.db.connection()
+        debates = _fetch_dicts(conn.execute("SELECT * FROM debates WHERE debate_id = ? LIMIT 1", (debate_id,)))
+        if not debates:
+            return None
+        debate = debates[0]
+
+        turns = _fetch_dicts(conn.execute(
+            "SELECT * FROM debate_turns WHERE debate_id = ? ORDER BY turn_number", (debate_id,)
+        ))
+        fallacies_raw = _fetch_dicts(conn.execute(
+            "SELECT * FROM fallacies WHERE turn_id IN (SELECT turn_id FROM debate_turns WHERE debate_id = ?)",
+            (debate_id,),
+        ))
+        fact_checks_raw = _fetch_dicts(conn.execute(
+            "SELECT * FROM fact_checks WHERE turn_id IN (SELECT turn_id FROM debate_turns WHERE debate_id = ?)",
+            (debate_id,),
+        ))
+        attach_turn_details(turns, fallacies_raw, fact_checks_raw)
+        debate['turns'] = turns
+        return debate
+
+    def list_debates(self, limit: int = 50, after: Optional[Tuple[str, str]] = None,
+                     include_summary: bool = False) -> List[Dict[str, Any]]:
+        """
+        List recent debates, newest first, with keyset pagination on
+        (created_at, debate_id). Each row carries CURSOR_KEY.
+        """
+        columns = list(LIST_COLUMNS)
+        if include_summary:
+            columns.append("summary")
+        where = ""
+        params: List[Any] = []
+        if after is not None:
+            where = "WHERE created_at < ? OR (created_at = ? AND debate_id < ?)"
+            params.extend([after[0], after[0], after[1]])
+        params.append(limit)
+
+        cursor = self.db.connection().execute(f"""
+            SELECT {', '.join(columns)}, created_at AS cursor_ts
+            FROM debates
+            {where}
+            ORDER BY created_at DESC, debate_id DESC
+            LIMIT ?
+        """, params)
+        rows = _fetch_dicts(cursor)
+        for row in rows:
+            row['CURSOR_KEY'] = (row.pop('CURSOR_TS'), row['DEBATE_ID'])
+        return rows
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path}
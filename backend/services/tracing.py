@@ -0,0 +1,335 @@
+"""
+Lightweight request tracing.
+
+Every HTTP request gets a trace ID (taken from an incoming X-Trace-Id or
+W3C traceparent header, otherwise generated) that is echoed back in the
+X-Trace-Id response header. Pipeline stages open spans with span() or
+@traced(); every upstream call timed by services.metrics.upstream() is a
+span too, so each OpenAI, Google, ElevenLabs call and Snowflake statement
+shows up under the stage that made it.
+
+The current span lives in a contextvar. Work handed to a thread pool only
+stays in the trace if it is wrapped with in_context().
+
+Finished spans are appended, one JSON object per line, to TRACE_EXPORT_PATH
+(default LIBRA_CACHE_DIR/traces.jsonl) by a background writer thread. The
+fields follow OTLP span naming (trace_id, span_id, parent_span_id,
+start_time_unix_nano, ...), so the file can be replayed into a collector.
+
+Configuration (environment):
+  TRACING_ENABLED       1 (default) or 0
+  TRACE_SAMPLE_RATE     fraction of new traces whose spans are exported (default 1.0)
+  TRACE_EXPORT_PATH     JSONL file to write
+  TRACE_EXPORT_MAX_MB   size at which the file is rotated to <path>.1 (default 100)
+"""
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from services.local_store import get_cache_dir
+
+TRACE_HEADER = "X-Trace-Id"
+SERVICE_NAME = "libra-backend"
+
+_TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _enabled() -> bool:
+    return os.getenv("TRACING_ENABLED", "1") != "0"
+
+
+def _new_id(nbytes: int) -> str:
+    return f"{random.getrandbits(nbytes * 8):0{nbytes * 2}x}"
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "attributes",
+                 "sampled", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def child(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> "Span":
+        return Span(name, self.trace_id, self.span_id, self.sampled, attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"[:500]
+        if self.sampled:
+            _exporter().export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded by span() outside a trace, so callers can always call set()."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("libra_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute on the current span (no-op outside a trace)."""
+    current = _current.get()
+    if current is not None:
+        current.set(key, value)
+
+
+def start_trace(name: str, trace_id: Optional[str] = None, parent_span_id: Optional[str] = None,
+                **attributes) -> Optional[Span]:
+    """Create (but don't activate) the root span of a new trace. None if tracing is off."""
+    if not _enabled():
+        return None
+    sampled = random.random() < float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    return Span(name, trace_id or _new_id(16), parent_span_id, sampled, attributes)
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attributes):
+    """
+    Time a block as a child of the current span: `with span("stage", key=value) as s:`.
+    Outside a trace this does nothing, unless root=True starts a new trace
+    (for background work such as save-queue flushes).
+    """
+    parent = _current.get()
+    if parent is not None:
+        current = parent.child(name, attributes)
+    elif root:
+        current = start_trace(name, **attributes)
+    else:
+        current = None
+    if current is None:
+        yield _NOOP
+        return
+
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current.reset(token)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(), named after the function by default."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Wrap fn to run in a copy of the caller's context, so spans opened on a
+    pool thread join the caller's trace: `pool.submit(in_context(fn), ...)`.
+    """
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Each call gets its own copy: a Context can't be entered by two threads at once
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+# -------------------- export --------------------
+class JsonlExporter:
+    """Appends finished spans to a JSONL file from a background thread."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.getenv("TRACE_EXPORT_PATH") or os.path.join(get_cache_dir(), "traces.jsonl")
+        self.max_bytes = max_bytes or int(float(os.getenv("TRACE_EXPORT_MAX_MB", "100")) * 1024 * 1024)
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self.dropped = 0
+
+    def export(self, finished: Span) -> None:
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            # Never block a request on trace output
+            self.dropped += 1
+
+    def _ensure_writer(self) -> None:
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._rotate_if_needed()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in batch))
+            except Exception as e:
+                print(f"⚠️  Trace export failed: {e}")
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait (up to timeout) for queued spans to be written."""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # The last batch may still be mid-write
+        time.sleep(0.05)
+
+
+_exporter_instance = None
+_exporter_lock = threading.Lock()
+
+
+def _exporter() -> JsonlExporter:
+    global _exporter_instance
+    if _exporter_instance is None:
+        with _exporter_lock:
+            if _exporter_instance is None:
+                _exporter_instance = JsonlExporter()
+    return _exporter_instance
+
+
+# -------------------- Flask --------------------
+def _stream_in_trace(body, root: Span):
+    _current.set(root)
+    error = None
+    try:
+        yield from body
+    except GeneratorExit:
+        root.set("http.client_disconnected", True)
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+        root.finish(error)
+        _current.set(None)
+
+
+def _incoming_trace(headers):
+    """(trace_id, parent_span_id) from request headers, if the caller sent valid ones."""
+    match = _TRACEPARENT_RE.match(headers.get("traceparent", "").strip().lower())
+    if match:
+        return match.group(1), match.group(2)
+    trace_id = headers.get(TRACE_HEADER, "").strip().lower()
+    if _TRACE_ID_RE.match(trace_id):
+        return trace_id, None
+    return None, None
+
+
+def init_app(app) -> None:
+    """Open a root span per request and echo its trace ID in X-Trace-Id."""
+    from flask import g, request
+
+    @app.before_request
+    def _trace_start():
+        trace_id, parent_span_id = _incoming_trace(request.headers)
+        root = start_trace("http.request", trace_id=trace_id, parent_span_id=parent_span_id,
+                           **{"http.method": request.method, "http.path": request.path})
+        if root is not None:
+            g._trace_span = root
+            _current.set(root)
+
+    @app.after_request
+    def _trace_header(response):
+        root = g.get("_trace_span")
+        if root is not None:
+            response.headers[TRACE_HEADER] = root.trace_id
+            root.set("http.status_code", response.status_code)
+            if request.url_rule is not None:
+                root.set("http.route", request.url_rule.rule)
+            if response.is_streamed:
+                # The body is produced after teardown; keep the trace open until it's sent
+                g.pop("_trace_span")
+                response.response = _stream_in_trace(response.response, root)
+        return response
+
+    @app.teardown_request
+    def _trace_finish(exc):
+        root = g.pop("_trace_span", None)
+        if root is None:
+            return
+        root.finish(exc)
+        # Streamed responses are torn down from the generator; set() works where reset(token) may not
+        _current.set(None)
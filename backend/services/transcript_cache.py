@@ -0,0 +1,177 @@
+"""
+Content-addressed transcript cache with in-flight request coalescing.
+
+Mobile retries often upload the same clip two or three times. Transcripts
+are keyed on a SHA-256 of the uploaded audio bytes plus the STT model ID
+and the audio normalization settings, kept in
+an in-memory LRU and, with TRANSCRIPT_CACHE_PERSIST=1, in a SQLite file
+shared by all worker processes.
+
+Concurrent requests for the same clip are coalesced: the first caller
+runs the STT request and the others wait for its result, so only one call
+per unique clip is in flight in a process.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.audio import AudioSource, hash_source
+from services.local_store import LocalDatabase, get_cache_dir
+from services.lru_cache import LRUCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    cache_key TEXT PRIMARY KEY,
+    transcript TEXT,
+    created_at REAL,
+    last_access REAL
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_last_access ON transcripts(last_access);
+"""
+
+# How many writes between size-cap checks of the persistent store
+_EVICT_EVERY = 50
+
+
+class _InFlight:
+    """Result slot shared by the callers waiting on one STT request."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class TranscriptCache:
+    """LRU (plus optional SQLite) cache of transcripts keyed on audio content."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 persist: Optional[bool] = None, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("TRANSCRIPT_CACHE_TTL", "86400"))
+        self.memory = LRUCache(max_entries or int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "1000")),
+                               ttl_seconds=self.ttl_seconds)
+        if persist is None:
+            persist = os.getenv("TRANSCRIPT_CACHE_PERSIST", "0") == "1"
+        self.db = None
+        if persist:
+            self.db = LocalDatabase(path or os.path.join(get_cache_dir(), "transcripts.sqlite3"), _SCHEMA)
+        self.max_persisted = int(os.getenv("TRANSCRIPT_CACHE_PERSIST_MAX", "20000"))
+        self._inflight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key_for(audio: AudioSource, model_id: str, settings: str = "") -> str:
+        """Key for audio bytes or a seekable file (hashed block by block)."""
+        return hashlib.sha256(f"{model_id}\n{settings}\n{hash_source(audio)}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        transcript = self.memory.get(key)
+        if transcript is not None or self.db is None:
+            return transcript
+        try:
+            conn = self.db.connection()
+            now = time.time()
+            row = conn.execute(
+                "SELECT transcript FROM transcripts WHERE cache_key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE transcripts SET last_access = ? WHERE cache_key = ?", (now, key))
+                self.memory.set(key, row[0])
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"⚠️  Transcript cache read failed: {e}")
+        return None
+
+    def set(self, key: str, transcript: str) -> None:
+        self.memory.set(key, transcript)
+        if self.db is None:
+            return
+        now = time.time()
+        try:
+            conn = self.db.connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (cache_key, transcript, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, transcript, now, now),
+            )
+            with self._lock:
+                self._writes += 1
+                check = self._writes % _EVICT_EVERY == 0
+            if check:
+                conn.execute("DELETE FROM transcripts WHERE created_at <= ?", (now - self.ttl_seconds,))
+                count = conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+                if count > self.max_persisted:
+                    conn.execute(
+                        "DELETE FROM transcripts WHERE cache_key IN "
+                        "(SELECT cache_key FROM transcripts ORDER BY last_access LIMIT ?)",
+                        (count - self.max_persisted,),
+                    )
+        except sqlite3.Error as e:
+            print(f"⚠️  Transcript cache write failed: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        """
+        Return the cached transcript for key, or run compute() once for all
+        concurrent callers with the same key and cache its result.
+        """
+        transcript = self.get(key)
+        if transcript is not None:
+            return transcript
+
+        with self._lock:
+            slot = self._inflight.get(key)
+            leader = slot is None
+            if leader:
+                slot = self._inflight[key] = _InFlight()
+            else:
+                slot.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            slot.done.wait()
+            if slot.error is not None:
+                raise slot.error
+            return slot.result
+
+        try:
+            slot.result = compute()
+            self.set(key, slot.result)
+            return slot.result
+        except BaseException as e:
+            slot.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            slot.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        with self._lock:
+            stats["coalesced"] = self.coalesced
+            stats["in_flight"] = len(self._inflight)
+        stats["persistent"] = self.db is not None
+        return stats
+
+
+# Singleton instance
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Get or create the transcript cache (None if TRANSCRIPT_CACHE_ENABLED=0)."""
+    global _transcript_cache
+    if os.getenv("TRANSCRIPT_CACHE_ENABLED", "1") == "0":
+        return None
+    if _transcript_cache is None:
+        with _transcript_cache_lock:
+            if _transcript_cache is None:
+                _transcript_cache = TranscriptCache()
+    return _transcript_cache
@@ -1,9 +1,20 @@
 import os
+import io
 import json
-from typing import Optional
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
 
 import requests
 
+from services.audio import (AudioSource, normalize_audio, settings_key, source_size, split_at_silence,
+                           stitch_transcripts)
+from services.clients import get_http_session, get_timeout
+from services.metrics import upstream
+from services.tracing import in_context, span, traced
+from services.transcript_cache import get_transcript_cache
+
 
 def _get_api_key() -> str:
     api_key = os.getenv("ELEVENLABS_API_KEY")
@@ -17,14 +28,88 @@ def _get_stt_url() -> str:
     return os.getenv("ELEVENLABS_STT_URL", "https://api.elevenlabs.io/v1/speech-to-text")
 
 
-def transcribe_audio(audio_bytes: bytes, mime_type: Optional[str] = None) -> str:
+def prepare_audio(audio: AudioSource, mime_type: Optional[str] = None):
     """
-    Send raw audio bytes to ElevenLabs Scribe and return the transcript text.
-    Expects 'text' field in JSON response.
+    Shrink audio before upload (mono, speech sample rate, silence trimmed,
+    compact codec). Accepts bytes or a seekable file. Returns (audio,
+    mime_type, info) with bytes_in / bytes_out; see services/audio.py.
     """
-    if not audio_bytes:
+    if not source_size(audio):
         raise ValueError("Empty audio payload")
+    return normalize_audio(audio, mime_type)
+
 
+class _MultipartBody(io.RawIOBase):
+    """
+    multipart/form-data body that streams an audio file instead of copying
+    it into memory. Seekable, so retries can rewind it, and sized, so
+    requests sends a Content-Length rather than a chunked body.
+    """
+
+    def __init__(self, fields: dict, file_field: str, file_obj, mime_type: str):
+        self.boundary = uuid.uuid4().hex
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        head += (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="audio"\r\n'
+                 f"Content-Type: {mime_type}\r\n\r\n").encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._parts = [(io.BytesIO(head), len(head)), (file_obj, source_size(file_obj)), (io.BytesIO(tail), len(tail))]
+        self._length = sum(size for _, size in self._parts)
+        self._pos = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._length}[whence]
+        self._pos = max(0, min(self._length, base + offset))
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._pos
+        out = []
+        start = 0
+        for part, part_size in self._parts:
+            end = start + part_size
+            if size > 0 and start <= self._pos < end:
+                part.seek(self._pos - start)
+                chunk = part.read(min(size, end - self._pos))
+                out.append(chunk)
+                self._pos += len(chunk)
+                size -= len(chunk)
+            start = end
+        return b"".join(out)
+
+
+def _segment_seconds() -> float:
+    return float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "45"))
+
+
+def segmentation_enabled() -> bool:
+    return os.getenv("TRANSCRIBE_SEGMENTED", "1") == "1"
+
+
+def _request_transcript(audio: AudioSource, mime_type: Optional[str]) -> str:
+    """
+    One ElevenLabs Scribe request; returns the 'text' field ('' if absent).
+    Files are streamed from disk rather than read into memory.
+    """
     api_key = _get_api_key()
     url = _get_stt_url()
 
@@ -32,35 +117,137 @@ def transcribe_audio(audio_bytes: bytes, mime_type: Optional[str] = None) -> str
         "xi-api-key": api_key
     }
 
-    files = {
-        "file": ("audio", audio_bytes, mime_type or "application/octet-stream")
-    }
     # Provide model selection; default to scribe v1 for batch accuracy
     data = {
         "model_id": os.getenv("ELEVENLABS_STT_MODEL_ID", "scribe_v1")
     }
 
-    response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
-    try:
-        response.raise_for_status()
-    except requests.HTTPError as http_err:
-        # Try to surface API error body if available
+    if isinstance(audio, (bytes, bytearray)):
+        files = {
+            "file": ("audio", audio, mime_type or "application/octet-stream")
+        }
+        post_kwargs = {"files": files, "data": data}
+    else:
+        body = _MultipartBody(data, "file", audio, mime_type or "application/octet-stream")
+        headers["Content-Type"] = body.content_type
+        post_kwargs = {"data": body}
+
+    with upstream("elevenlabs", "speech_to_text"):
+        response = get_http_session("elevenlabs").post(
+            url, headers=headers, timeout=get_timeout("elevenlabs"), **post_kwargs
+        )
         try:
-            payload = response.json()
-        except Exception:
-            payload = {"error": response.text}
-        raise RuntimeError(f"ElevenLabs STT error: {payload}") from http_err
+            response.raise_for_status()
+        except requests.HTTPError as http_err:
+            # Try to surface API error body if available
+            try:
+                payload = response.json()
+            except Exception:
+                payload = {"error": response.text}
+            raise RuntimeError(f"ElevenLabs STT error: {payload}") from http_err
 
     try:
         body = response.json()
     except json.JSONDecodeError:
         raise RuntimeError("Invalid JSON response from ElevenLabs")
 
-    text = body.get("text")
-    if not text:
-        # some responses may nest results; fallback to entire payload for debugging
-        raise RuntimeError("Transcription returned no text")
+    return body.get("text") or ""
+
+
+def _transcribe_segment(segment: dict, retries: int) -> str:
+    """Transcribe one segment, retrying just this segment on failure."""
+    with span("transcribe_segment", start_s=segment["start"], end_s=segment["end"]) as seg_span:
+        for attempt in range(retries + 1):
+            seg_span.set("attempts", attempt + 1)
+            try:
+                return _request_transcript(segment["audio"], segment["mime_type"])
+            except ValueError:
+                raise
+            except Exception as e:
+                if attempt == retries:
+                    raise RuntimeError(
+                        f"Segment {segment['start']:.1f}-{segment['end']:.1f}s failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                print(f"⚠️  Segment {segment['start']:.1f}-{segment['end']:.1f}s failed (attempt {attempt + 1}), retrying: {e}")
+                time.sleep(0.5 * (2 ** attempt))
+        return ""
+
+
+def transcribe_segmented(audio: AudioSource, mime_type: Optional[str] = None) -> Optional[str]:
+    """
+    Split long audio at silence into segments of at most
+    TRANSCRIBE_SEGMENT_SECONDS, transcribe them concurrently and stitch the
+    text back together in order. Returns None when the audio is short
+    enough for one request or can't be decoded for splitting.
+    """
+    try:
+        segments = split_at_silence(
+            audio, mime_type,
+            max_seconds=_segment_seconds(),
+            overlap_seconds=float(os.getenv("TRANSCRIBE_SEGMENT_OVERLAP", "1.0")),
+        )
+    except Exception as e:
+        print(f"⚠️  Could not split audio, transcribing in one request: {e}")
+        return None
+    if not segments or len(segments) == 1:
+        return None
+
+    retries = int(os.getenv("TRANSCRIBE_SEGMENT_RETRIES", "2"))
+    max_workers = min(int(os.getenv("TRANSCRIBE_MAX_PARALLEL", "4")), len(segments))
+    print(f"✂️  Transcribing {len(segments)} segments ({segments[-1]['end']:.1f}s) with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-segment") as pool:
+        texts = list(pool.map(in_context(lambda seg: _transcribe_segment(seg, retries)), segments))
+    return stitch_transcripts(texts, [seg["overlapped"] for seg in segments])
+
+
+@traced()
+def transcribe_audio(audio_bytes: AudioSource, mime_type: Optional[str] = None, normalize: bool = True,
+                     audio_info: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Send audio (bytes or a seekable file such as a spooled upload) to
+    ElevenLabs Scribe and return the transcript text.
+    Expects 'text' field in JSON response.
 
-    return text
+    Audio is normalized first (see prepare_audio) unless normalize=False,
+    e.g. because the caller already did it. Recordings longer than
+    TRANSCRIBE_SEGMENT_SECONDS are transcribed as parallel segments
+    (TRANSCRIBE_SEGMENTED=0 to always send one request).
 
+    Transcripts are cached by the audio as uploaded (before normalization,
+    whose output isn't byte-stable), the model and the normalization
+    settings, and concurrent requests for the same clip share one STT call
+    (services/transcript_cache.py). A cache hit skips normalization too.
 
+    If audio_info is given it is filled with the prepare_audio info
+    (bytes_in, bytes_out, method, normalize_ms), or method "cached" when
+    the transcript was reused.
+    """
+    size = source_size(audio_bytes)
+    if not size:
+        raise ValueError("Empty audio payload")
+    info = audio_info if audio_info is not None else {}
+    info.update(bytes_in=size, bytes_out=size, method="cached" if normalize else "none")
+
+    def compute():
+        audio, mime = audio_bytes, mime_type
+        if normalize:
+            audio, mime, prepared = prepare_audio(audio, mime)
+            info.update(prepared)
+        try:
+            text = transcribe_segmented(audio, mime) if segmentation_enabled() else None
+            if text is None:
+                text = _request_transcript(audio, mime)
+        finally:
+            if audio is not audio_bytes and hasattr(audio, "close"):
+                audio.close()
+        if not text:
+            # some responses may nest results; fallback to entire payload for debugging
+            raise RuntimeError("Transcription returned no text")
+        return text
+
+    cache = get_transcript_cache()
+    if cache is None:
+        return compute()
+    key = cache.key_for(audio_bytes, os.getenv("ELEVENLABS_STT_MODEL_ID", "scribe_v1"),
+                        settings_key() if normalize else "raw")
+    return cache.get_or_compute(key, compute)
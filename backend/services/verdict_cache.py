@@ -0,0 +1,320 @@
+"""
+Cross-debate cache of fact-check verdicts.
+
+Claims are stored under their normalized text. Lookups first try an exact
+match on that key, then fall back to near-duplicate matching with MinHash
+signatures and LSH banding, so a rewording of a previously checked claim
+("is in Paris" / "is located in Paris") can reuse its verdict and evidence.
+Similar wording is not similar meaning once an entity, number, negation
+or conjunction changes ("visible from space" vs "visible from the Moon"),
+so those must match exactly, and a rewording may add or drop words but
+not swap one for another ("went up" vs "went down"). Band buckets are indexed in SQLite,
+which keeps lookups to a couple of indexed queries regardless of how many
+claims are stored. Expired verdicts are purged every PURGE_EVERY stores.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from services.local_store import LocalDatabase, get_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    claim_key TEXT UNIQUE,
+    statement TEXT,
+    verdict TEXT,
+    explanation TEXT,
+    evidence TEXT,
+    guard TEXT,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS claim_bands (
+    band_key INTEGER,
+    claim_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_claim_bands_key ON claim_bands(band_key);
+CREATE INDEX IF NOT EXISTS idx_claim_bands_claim ON claim_bands(claim_id);
+CREATE INDEX IF NOT EXISTS idx_claims_created_at ON claims(created_at);
+"""
+
+NUM_PERM = 64
+# Two rows per band, so claims sharing half their shingles almost always collide
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_CANDIDATES = 50
+PURGE_EVERY = 100
+
+# Fixed seed so signatures are stable across processes and restarts
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "by", "with", "is",
+    "are", "was", "were", "be", "been", "it", "its", "that", "this", "as",
+    "from", "than", "there", "has", "have", "had", "s",
+}
+# Words that flip, qualify or extend a claim; rewordings must agree on these
+_QUALIFIERS = {
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without",
+    "rarely", "seldom", "hardly", "barely", "only", "except", "unless", "if",
+    "and", "or", "but", "although",
+}
+
+
+def normalize_claim(text: str) -> str:
+    """Lowercase, drop punctuation (keeping decimal points) and collapse whitespace."""
+    text = (text or "").lower().replace("n't", " not")
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text)
+    text = re.sub(r"[^\w\s.%]|(?<!\d)\.|\.(?!\d)", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _tokens(normalized: str) -> List[str]:
+    return [t for t in normalized.split(" ") if t and t not in _STOPWORDS]
+
+
+def _shingles(tokens: List[str]) -> Set[str]:
+    shingles = set(tokens)
+    shingles.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return shingles
+
+
+def _entities(statement: str) -> Set[str]:
+    """Tokens of capitalized words that don't start a sentence."""
+    names = []
+    for sentence in re.split(r"[.!?]\s+", statement or ""):
+        words = re.findall(r"[^\W\d_][\w'-]*", sentence)
+        names.extend(w for w in words[1:] if w[0].isupper())
+    return set(_tokens(normalize_claim(" ".join(names))))
+
+
+def _guard(statement: str, tokens: List[str]) -> str:
+    """Entities, numbers and qualifiers, which must match exactly for two claims to be duplicates."""
+    entities = _entities(statement)
+    keep = {t for t in tokens if t in _QUALIFIERS or t in entities or any(c.isdigit() for c in t)}
+    return " ".join(sorted(keep))
+
+
+def _rewording_score(tokens_a: List[str], tokens_b: List[str]) -> float:
+    """
+    Jaccard similarity of the two claims' shingles, or 0.0 if each claim has a
+    word the other lacks: a rewording may add or drop words, not swap them.
+    """
+    words_a, words_b = set(tokens_a), set(tokens_b)
+    if not (words_a <= words_b or words_b <= words_a):
+        return 0.0
+    shingles_a, shingles_b = _shingles(tokens_a), _shingles(tokens_b)
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(shingles: Set[str]) -> List[int]:
+    """MinHash signature of a shingle set using NUM_PERM universal hash permutations."""
+    hashes = [_hash64(s) for s in shingles] or [0]
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def _band_keys(signature: List[int]) -> List[int]:
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<I{ROWS_PER_BAND}Q", band, *rows), digest_size=8).digest()
+        # SQLite integers are signed 64-bit
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+class VerdictCache:
+    """Claim verdict store with exact and MinHash/LSH near-duplicate lookup."""
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 similarity: Optional[float] = None):
+        self.path = path or os.path.join(get_cache_dir(), "verdict_cache.sqlite3")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("VERDICT_CACHE_TTL", "2592000"))
+        self.similarity = similarity if similarity is not None else float(os.getenv("VERDICT_CACHE_SIMILARITY", "0.5"))
+        self.db = LocalDatabase(self.path, _SCHEMA)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._stores = 0
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def lookup(self, statement: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a fresh cached verdict for the statement or a near-duplicate of it.
+
+        The returned dict has statement/verdict/explanation/evidence fields of the
+        original check plus 'similarity' (1.0 for an exact match).
+        """
+        normalized = normalize_claim(statement)
+        if not normalized:
+            return None
+        fresh_after = time.time() - self.ttl_seconds
+
+        try:
+            conn = self.db.connection()
+            row = conn.execute(
+                "SELECT statement, verdict, explanation, evidence FROM claims "
+                "WHERE claim_key = ? AND created_at > ?",
+                (normalized, fresh_after),
+            ).fetchone()
+            if row is not None:
+                self._count("exact_hits")
+                return self._entry(row, 1.0)
+
+            tokens = _tokens(normalized)
+            band_keys = _band_keys(minhash(_shingles(tokens)))
+            placeholders = ",".join("?" * len(band_keys))
+            # Filter before limiting, and keep the claims sharing the most bands,
+            # so stale or non-matching rows can't crowd out the real match
+            candidates = conn.execute(
+                f"""
+                SELECT c.statement, c.verdict, c.explanation, c.evidence, c.claim_key
+                FROM claims c
+                JOIN (
+                    SELECT b.claim_id, COUNT(*) AS shared
+                    FROM claim_bands b JOIN claims m ON m.claim_id = b.claim_id
+                    WHERE b.band_key IN ({placeholders}) AND m.guard = ? AND m.created_at > ?
+                    GROUP BY b.claim_id
+                    ORDER BY shared DESC
+                    LIMIT {_MAX_CANDIDATES}
+                ) top ON top.claim_id = c.claim_id
+                """,
+                (*band_keys, _guard(statement, tokens), fresh_after),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️  Verdict cache read failed: {e}")
+            return None
+
+        best, best_score = None, 0.0
+        for cand in candidates:
+            score = _rewording_score(tokens, _tokens(cand[4]))
+            if score > best_score:
+                best, best_score = cand, score
+
+        if best is None or best_score < self.similarity:
+            self._count("misses")
+            return None
+        self._count("near_hits")
+        return self._entry(best, best_score)
+
+    @staticmethod
+    def _entry(row, score: float) -> Dict[str, Any]:
+        return {
+            "statement": row[0],
+            "verdict": row[1],
+            "explanation": row[2],
+            "evidence": json.loads(row[3] or "[]"),
+            "similarity": round(score, 3),
+        }
+
+    def store(self, result: Dict[str, Any]) -> None:
+        """Record the verdict of a completed check_single_statement run."""
+        normalized = normalize_claim(result.get("statement", ""))
+        if not normalized:
+            return
+        statement = result.get("statement", "")
+        tokens = _tokens(normalized)
+        band_keys = _band_keys(minhash(_shingles(tokens)))
+        try:
+            conn = self.db.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute("SELECT claim_id FROM claims WHERE claim_key = ?", (normalized,)).fetchone()
+                if old is not None:
+                    conn.execute("DELETE FROM claim_bands WHERE claim_id = ?", (old[0],))
+                    conn.execute("DELETE FROM claims WHERE claim_id = ?", (old[0],))
+                claim_id = conn.execute(
+                    """
+                    INSERT INTO claims
+                        (claim_key, statement, verdict, explanation, evidence, guard, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (normalized, statement, result.get("verdict"),
+                     result.get("explanation", ""), json.dumps(result.get("evidence", [])),
+                     _guard(statement, tokens), time.time()),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO claim_bands (band_key, claim_id) VALUES (?, ?)",
+                    [(key, claim_id) for key in band_keys],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            with self._lock:
+                self._stores += 1
+                purge = self._stores % PURGE_EVERY == 1
+            if purge:
+                self.purge_expired()
+        except sqlite3.Error as e:
+            print(f"⚠️  Verdict cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete verdicts older than the TTL. Returns the number removed."""
+        conn = self.db.connection()
+        cutoff = time.time() - self.ttl_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM claim_bands WHERE claim_id IN (SELECT claim_id FROM claims WHERE created_at <= ?)",
+                (cutoff,),
+            )
+            removed = conn.execute("DELETE FROM claims WHERE created_at <= ?", (cutoff,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            exact, near, misses = self.exact_hits, self.near_hits, self.misses
+        total = exact + near + misses
+        return {
+            "exact_hits": exact,
+            "near_hits": near,
+            "misses": misses,
+            "hit_rate": round((exact + near) / total, 4) if total else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity": self.similarity,
+        }
+
+
+# Singleton instance
+_verdict_cache = None
+_verdict_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """Get or create the verdict cache singleton (None if VERDICT_CACHE_ENABLED=0)."""
+    global _verdict_cache
+    if os.getenv("VERDICT_CACHE_ENABLED", "1") == "0":
+        return None
+    if _verdict_cache is None:
+        with _verdict_cache_lock:
+            if _verdict_cache is None:
+                _verdict_cache = VerdictCache()
+    return _verdict_cache
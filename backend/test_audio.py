@@ -0,0 +1,39 @@
+"""
+Tests for joining segment transcripts (services/audio.py).
+
+    cd backend && python -m pytest -q test_audio.py
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.audio import stitch_transcripts
+
+
+def test_silence_cut_keeps_repeated_words():
+    assert stitch_transcripts(["we need to act now", "now is the time"], [False, False]) == \
+        "we need to act now now is the time"
+    assert stitch_transcripts(["I told them no.", "No, I meant later."], [False, False]) == \
+        "I told them no. No, I meant later."
+
+
+def test_no_overlap_flags_joins_as_is():
+    assert stitch_transcripts(["we need to act now", "now is the time"]) == \
+        "we need to act now now is the time"
+
+
+def test_overlapped_boundary_drops_repeated_run():
+    assert stitch_transcripts(["the quick brown fox", "brown fox jumps over"], [True, False]) == \
+        "the quick brown fox jumps over"
+
+
+def test_overlapped_boundary_drops_clipped_word():
+    assert stitch_transcripts(["the quick brown fox jum", "jumps over the dog"], [True, False]) == \
+        "the quick brown fox jumps over the dog"
+
+
+def test_only_overlapped_boundaries_are_deduplicated():
+    texts = ["act now", "now is the time", "time and again"]
+    assert stitch_transcripts(texts, [False, True, False]) == "act now now is the time and again"
@@ -7,7 +7,7 @@ import os
 # Add backend to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from services.snowflake_service import get_snowflake_service
+from services.snowflake_service import get_debate_backend
 import json
 
 def test_debate_retrieval():
@@ -16,7 +16,7 @@ def test_debate_retrieval():
     print("="*60 + "\n")
     
     try:
-        db_service = get_snowflake_service()
+        db_service = get_debate_backend()
         
         # First, list debates to get an ID
         print("📋 Fetching list of debates...")
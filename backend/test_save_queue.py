@@ -0,0 +1,168 @@
+"""
+Tests for the write-behind save journal (services/save_queue.py), run
+against the SQLite storage backend in a temporary directory.
+
+    cd backend && python -m pytest -q test_save_queue.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.save_queue import FAILED, FLUSHING, SAVED, SaveQueue
+from services.sqlite_service import SQLiteDebateService
+
+
+def _debate(debate_id):
+    return {
+        "debate_id": debate_id,
+        "topic": "Renewables",
+        "speaker_a": "A",
+        "speaker_b": "B",
+        "summary": "",
+        "turns": [{"turn_number": 1, "speaker": "A", "transcript": "Solar is cheap.", "duration": 10,
+                   "fallacies": [], "fact_checks": []}],
+    }
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class FailingStore:
+    def __init__(self):
+        self.calls = 0
+
+    def save_debate_summaries(self, debates):
+        self.calls += 1
+        raise RuntimeError("storage unavailable")
+
+    def get_debate_summary(self, debate_id):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBRA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRACING_ENABLED", "0")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteDebateService(str(tmp_path / "libra.sqlite3"))
+
+
+def _queue(tmp_path, store):
+    queue = SaveQueue(store=store, path=str(tmp_path / "journal.sqlite3"))
+    # Drive flushes by hand instead of from the background thread
+    queue.start = lambda: None
+    queue.backoff = 0
+    return queue
+
+
+def _stored_rows(store, debate_id):
+    return store.db.connection().execute(
+        "SELECT COUNT(*) FROM debates WHERE debate_id = ?", (debate_id,)
+    ).fetchone()[0]
+
+
+def test_flush_saves_pending_debates(tmp_path, store):
+    queue = _queue(tmp_path, store)
+    queue.enqueue(_debate("d1"))
+    queue.enqueue(_debate("d2"))
+
+    assert queue.flush_once() == 2
+    assert queue.status("d1")["status"] == SAVED
+    assert _stored_rows(store, "d1") == 1
+    assert store.get_debate_summary("d2") is not None
+    assert queue.flush_once() == 0
+
+
+def test_crash_after_commit_is_not_saved_twice(tmp_path, store):
+    queue = _queue(tmp_path, store)
+    queue.enqueue(_debate("d1"))
+
+    # The worker commits the batch, then dies before marking it saved
+    entries = queue._claim_batch()
+    store.save_debate_summaries([e["payload"] for e in entries])
+    queue.db.connection().execute("UPDATE pending_saves SET claimed_by = ?", (_dead_pid(),))
+    status = queue.status("d1")
+    assert (status["status"], status["attempts"]) == (FLUSHING, 0)
+
+    assert queue.flush_once() == 1
+    assert queue.status("d1")["status"] == SAVED
+    assert _stored_rows(store, "d1") == 1
+
+
+def test_crash_before_commit_is_replayed(tmp_path, store):
+    queue = _queue(tmp_path, store)
+    queue.enqueue(_debate("d1"))
+
+    queue._claim_batch()
+    queue.db.connection().execute("UPDATE pending_saves SET claimed_by = ?", (_dead_pid(),))
+
+    assert queue.flush_once() == 1
+    assert _stored_rows(store, "d1") == 1
+
+
+def test_expired_lease_is_reclaimed(tmp_path, store):
+    queue = _queue(tmp_path, store)
+    queue.lease_seconds = 60
+    queue.enqueue(_debate("d1"))
+
+    # Claimed by a live process that stopped making progress
+    queue._claim_batch()
+    assert queue.flush_once() == 0
+    queue.db.connection().execute("UPDATE pending_saves SET claimed_at = ?", (time.time() - 120,))
+
+    assert queue.flush_once() == 1
+    assert queue.status("d1")["status"] == SAVED
+    assert _stored_rows(store, "d1") == 1
+
+
+def test_gives_up_after_last_attempt(tmp_path):
+    failing = FailingStore()
+    queue = _queue(tmp_path, failing)
+    queue.max_attempts = 3
+    queue.enqueue(_debate("d1"))
+
+    for attempt in range(1, 4):
+        assert queue.flush_once() == 0
+        status = queue.status("d1")
+        assert status["attempts"] == attempt
+        assert "storage unavailable" in status["last_error"]
+    assert status["status"] == FAILED
+
+    assert queue.flush_once() == 0
+    assert failing.calls == 3
+
+
+def test_retry_failed_requeues_and_saves(tmp_path, store):
+    queue = _queue(tmp_path, FailingStore())
+    queue.max_attempts = 1
+    queue.enqueue(_debate("d1"))
+    queue.flush_once()
+    assert queue.status("d1")["status"] == FAILED
+
+    queue._store = store
+    assert queue.retry_failed() == 1
+    assert queue.flush_once() == 1
+    assert _stored_rows(store, "d1") == 1
+
+
+def test_one_bad_debate_does_not_block_the_batch(tmp_path, store):
+    queue = _queue(tmp_path, store)
+    queue.enqueue(_debate("good"))
+    # SQLite can't bind a dict, so this one fails on its own
+    queue.enqueue({**_debate("bad"), "topic": {"not": "a string"}})
+
+    assert queue.flush_once() == 1
+    assert queue.status("good")["status"] == SAVED
+    assert queue.status("bad")["attempts"] == 1
@@ -0,0 +1,89 @@
+"""
+Tests for near-duplicate matching in the verdict cache
+(services/verdict_cache.py). The pairs below are what the default
+VERDICT_CACHE_SIMILARITY is tuned on: rewordings that should reuse a
+cached verdict, and different claims that must not.
+
+    cd backend && python -m pytest -q test_verdict_cache.py
+"""
+import os
+import sys
+import time
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.verdict_cache import PURGE_EVERY, VerdictCache
+
+REWORDINGS = [
+    ("The Eiffel Tower is in Paris.", "The Eiffel Tower is located in Paris."),
+    ("The Eiffel Tower is in Paris.", "The Eiffel Tower is situated in Paris."),
+    ("Unemployment fell to 3.5% last year.", "Last year, unemployment fell to 3.5%."),
+    ("The unemployment rate fell to 3.5% last year.", "Unemployment fell to 3.5% last year."),
+    ("Solar is the cheapest source of electricity in history.",
+     "Solar is now the cheapest source of electricity in history."),
+    ("The Great Wall of China is visible from space.", "The Great Wall of China is visible from outer space."),
+    ("Crime has doubled since 2010.", "Crime doubled since 2010."),
+    ("Wages and prices rose last year.", "Prices and wages rose last year."),
+    ("The vaccine doesn't cause autism.", "The vaccine does not cause autism."),
+]
+
+DIFFERENT_CLAIMS = [
+    ("China has the largest population in the world.", "India has the largest population in the world."),
+    ("The Great Wall of China is visible from space.", "The Great Wall of China is visible from the Moon."),
+    ("Unemployment fell to 3.5% last year.", "Unemployment fell to 4.5% last year."),
+    ("Vaccines cause autism.", "Vaccines do not cause autism."),
+    ("Solar power is cheap.", "Solar power is rarely cheap."),
+    ("Solar power is cheap.", "Solar power is cheap in Germany."),
+    ("Solar power is cheap.", "Solar power is cheap but unreliable."),
+    ("Solar power is cheap.", "Solar power is cheap and reliable."),
+    ("Taxes on the rich went up.", "Taxes on the rich went down."),
+    ("Inflation is at a record high.", "Inflation is at a record low."),
+    ("Most voters support the bill.", "Few voters support the bill."),
+    ("In this story men bite dogs.", "In this story dogs bite men."),
+    ("Renewables are cheaper than coal.", "Coal is cheaper than renewables."),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VerdictCache(path=str(tmp_path / "verdicts.sqlite3"), ttl_seconds=3600)
+
+
+def _result(statement):
+    return {"statement": statement, "verdict": "TRUE", "explanation": "Checked.", "evidence": []}
+
+
+@pytest.mark.parametrize("cached, asked", REWORDINGS)
+def test_rewording_reuses_verdict(cache, cached, asked):
+    cache.store(_result(cached))
+    hit = cache.lookup(asked)
+    assert hit is not None
+    assert hit["statement"] == cached
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT_CLAIMS)
+def test_different_claim_misses(cache, cached, asked):
+    cache.store(_result(cached))
+    assert cache.lookup(asked) is None
+    cache.store(_result(asked))
+    assert cache.lookup(cached)["statement"] == cached
+
+
+def test_exact_match_after_normalization(cache):
+    cache.store(_result("Wind power is CHEAPER than gas!"))
+    assert cache.lookup("wind power is cheaper than gas")["similarity"] == 1.0
+
+
+def test_store_purges_expired_verdicts(cache):
+    cache.store(_result("Crime has doubled since 2010."))
+    cache.db.connection().execute("UPDATE claims SET created_at = ?", (time.time() - 7200,))
+
+    cache._stores = PURGE_EVERY
+    cache.store(_result("Wind power is cheaper than gas."))
+    assert cache.db.connection().execute("SELECT COUNT(*) FROM claims").fetchone()[0] == 1
+    assert cache.db.connection().execute(
+        "SELECT COUNT(DISTINCT claim_id) FROM claim_bands"
+    ).fetchone()[0] == 1
@@ -0,0 +1,72 @@
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn_conf.py wsgi:app
+
+See gunicorn_conf.py for the worker model and its settings.
+"""
+import os
+
+from app import app as flask_app
+
+try:
+    import gevent
+except ImportError:
+    gevent = None
+
+
+class RequestTimeout:
+    """
+    Abort requests that run longer than `seconds` with a 504.
+
+    Only active under gevent workers, where each request runs in its own
+    greenlet and a gevent.Timeout can interrupt it while it waits on an
+    upstream call. Streaming responses are cut off when the timer fires.
+    """
+
+    def __init__(self, app, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    def __call__(self, environ, start_response):
+        if not self.seconds or gevent is None or not _gevent_patched():
+            return self.app(environ, start_response)
+
+        timer = gevent.Timeout(self.seconds)
+        timer.start()
+        try:
+            result = self.app(environ, start_response)
+        except gevent.Timeout as e:
+            if e is not timer:
+                raise
+            print(f"⏱️  Request timed out after {self.seconds:g}s: {environ.get('PATH_INFO')}")
+            start_response("504 Gateway Timeout", [("Content-Type", "application/json")])
+            return [b'{"error": "Request timed out"}']
+        except BaseException:
+            timer.cancel()
+            raise
+        return _TimedIterable(result, timer)
+
+
+class _TimedIterable:
+    """Keeps the request timer armed while a (streaming) body is sent."""
+
+    def __init__(self, iterable, timer):
+        self.iterable = iterable
+        self.timer = timer
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        self.timer.cancel()
+        if hasattr(self.iterable, "close"):
+            self.iterable.close()
+
+
+def _gevent_patched() -> bool:
+    from gevent import monkey
+    return monkey.is_module_patched("socket")
+
+
+app = RequestTimeout(flask_app, float(os.getenv("WEB_REQUEST_TIMEOUT", "120")))
@@ -207,7 +207,8 @@ export default function TurnScreen() {
       
       // Web vs Native file upload handling
       let res: Response;
-      const backendUrl = `${getBackendBaseUrl()}/api/transcribe`;
+      // One upload: the backend transcribes, then runs fallacy + fact checks in parallel
+      const backendUrl = `${getBackendBaseUrl()}/api/turn`;
       console.log('📡 Uploading to:', backendUrl);
       
       if (Platform.OS === 'web' && uri) {
@@ -258,10 +259,14 @@ export default function TurnScreen() {
       console.log('✅ Transcript received:', transcript.substring(0, 50) + '...');
       setTranscript(transcript);
       
-      // Analyze: fallacies then fact-checks
-      console.log('🔍 Running analysis...');
-      const fallacies = await analyzeFallacies(transcript, currentTurn.speaker);
-      const factChecks = await factcheckTranscript(transcript);
+      // Analysis comes back with the transcript; fall back to separate calls if missing
+      console.log('🔍 Running analysis...', data.timings);
+      const fallacies = Array.isArray(data.fallacies)
+        ? data.fallacies
+        : await analyzeFallacies(transcript, currentTurn.speaker);
+      const factChecks = Array.isArray(data.factChecks)
+        ? data.factChecks
+        : await factcheckTranscript(transcript);
       console.log('✅ Analysis complete. Fallacies:', fallacies.length, 'Fact checks:', factChecks.length);
       setAnalysis(fallacies, factChecks);
       setUploadingLocal(false);